@@ -1,55 +1,81 @@
 from flask import Flask, render_template, redirect, url_for, flash, request, jsonify
+from flask import stream_template, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Supplier, Product, Project, TrendCache
+from models import db, User, Supplier, Project, TrendCache
 from forms import RegistrationForm, LoginForm, SupplierForm
-from services import get_market_trends, get_financial_data, get_trending_searches
-from comparison import compare_suppliers
-from reports import generate_pdf_report
+from services import get_market_trends, get_financial_data, get_trending_searches, get_social_buzz
+from parallel import Batch
+from comparison import SupplierMatrix
+from search import match_suppliers, MATCH_LIMIT
+from stats import get_platform_counts
+from matcher import load_matcher
+from identity import load_user
+from fragments import FragmentCacheExtension, conditional_page
+from supplier_map import supplier_page, DEFAULT_PAGE_SIZE
+from warmup import configure_template_cache, ensure_schema
+from db_config import init_db, database_uri, replica_uri
+from reports import build_keyword_report
+from jobs import submit_report, get_job, job_status
+from batch import analyze_keywords, is_keyword_list, ndjson, unique_keywords, MAX_KEYWORDS as MAX_BATCH_KEYWORDS
 from flask import send_file
+from io import BytesIO
 import os
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-very-secret-key-123'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+# Optional read-only bind for read-heavy routes (see routing.py)
+app.config['SQLALCHEMY_REPLICA_URI'] = replica_uri(app.config['SQLALCHEMY_DATABASE_URI'])
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Set when scheduler.py runs next to the web workers; requests then only read cached data
+app.config['PREFETCH_ENABLED'] = os.environ.get('PREFETCH_ENABLED') == '1'
+# Fetch the /results data sources concurrently instead of one after another
+app.config['RESULTS_PARALLEL'] = os.environ.get('RESULTS_PARALLEL', '1') == '1'
+# Seconds each /results source may take before the page renders without it
+app.config['RESULTS_DEADLINES'] = {'trends': 8, 'finance': 6, 'social': 8}
+# Stream the /trends page to the browser as it renders (?stream=0 renders it whole)
+app.config['TRENDS_STREAMING'] = os.environ.get('TRENDS_STREAMING', '1') == '1'
+# Processes rendering queued PDF reports (see jobs.py)
+app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', 2))
+# Matched suppliers /results ranks, best text match first
+app.config['RESULTS_MATCH_LIMIT'] = int(os.environ.get('RESULTS_MATCH_LIMIT', MATCH_LIMIT))
+# Recommendation cards shown on /results; the comparison covers every match
+app.config['RESULTS_TOP_SUPPLIERS'] = int(os.environ.get('RESULTS_TOP_SUPPLIERS', 20))
 
-db.init_app(app)
+init_db(app)
+app.jinja_env.add_extension(FragmentCacheExtension)
+configure_template_cache(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# Cached principal instead of a User query per request (see identity.py)
+login_manager.user_loader(load_user)
 
-# Create database tables
-with app.app_context():
-    db.create_all()
+# Create database tables and apply pending migrations, once per schema version
+ensure_schema(app)
 
 @app.route('/')
 def index():
-    from services import get_market_marquee_data, get_advanced_trends
+    from services import get_market_marquee_data, get_sector_summaries
     marquee = get_market_marquee_data()
     
     # Platform Business Stats
-    user_base = User.query.count()
+    counts = get_platform_counts()
+    user_base = counts['users']
     stats = {
         'users': user_base + 84 if user_base < 100 else user_base, 
-        'suppliers': Supplier.query.count(),
-        'projects': Project.query.count()
+        'suppliers': counts['suppliers'],
+        'projects': counts['projects']
     }
 
     # High-level Sector Trends
-    sectors = {
-        'tech': get_advanced_trends('tech')[0] if get_advanced_trends('tech') else {'keyword': 'Automation', 'volume': '12M', 'growth': 85},
-        'fashion': get_advanced_trends('fashion')[0] if get_advanced_trends('fashion') else {'keyword': 'Style', 'volume': '5M', 'growth': 22},
-        'food': get_advanced_trends('food')[0] if get_advanced_trends('food') else {'keyword': 'Organic', 'volume': '3M', 'growth': 14},
-        'gym': get_advanced_trends('gym')[0] if get_advanced_trends('gym') else {'keyword': 'Fitness', 'volume': '8M', 'growth': 45},
-    }
+    sectors = get_sector_summaries(['tech', 'fashion', 'food', 'gym'])
     
-    return render_template('index.html', marquee=marquee, stats=stats, sectors=sectors)
+    return conditional_page([marquee, stats, sectors],
+                            lambda: render_template('index.html', marquee=marquee, stats=stats, sectors=sectors))
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -73,7 +99,7 @@ def login():
 def dashboard():
     projects = Project.query.filter_by(user_id=current_user.id).order_by(Project.created_at.desc()).all()
     total_projects = len(projects)
-    total_suppliers = Supplier.query.count()
+    total_suppliers = get_platform_counts()['suppliers']
     
     # Live Finance Sentiment
     finance = get_financial_data()
@@ -83,7 +109,12 @@ def dashboard():
     marquee = get_market_marquee_data()
     
     trends = get_trending_searches()
-    return render_template('dashboard.html', 
+    # The user's projects are part of the page version but never cached as HTML
+    project_rows = [[p.id, p.name, p.business_type, p.budget, p.location, p.target_date, p.preference]
+                    for p in projects]
+    inputs = [current_user.username, current_user.role, trends, project_rows,
+              total_suppliers, finance, marquee]
+    return conditional_page(inputs, lambda: render_template('dashboard.html', 
                            name=current_user.username, 
                            role=current_user.role, 
                            trends=trends, 
@@ -92,7 +123,7 @@ def dashboard():
                            total_suppliers=total_suppliers,
                            sentiment=sentiment,
                            finance=finance,
-                           marquee=marquee)
+                           marquee=marquee))
 
 @app.route('/create_project', methods=['POST'])
 @login_required
@@ -131,37 +162,16 @@ def delete_project(project_id):
     flash(f'Project "{project_name}" deleted successfully.', 'success')
     return redirect(url_for('dashboard'))
 
+CHAT_RESPONSES = load_matcher('chat_responses.json')
+
 @app.route('/api/chat', methods=['POST'])
 def assistant_chat():
     data = request.json
     msg = data.get('message', '').lower()
     
-    # Smart & Friendly Logic
-    responses = {
-        'hi': "Hello! I am your EntreHub Guide. How can I help you build your dream project today? 😊",
-        'hii': "Hey there! Ready to explore some big business ideas?",
-        'hey': "Hi! What's on your mind today? Are we starting a new venture?",
-        'hello': "Hi there! Ready to analyze some market trends? Just tell me what's on your mind.",
-        'سلام': "وعليكم السلام! كيف يمكنني مساعدتك في بناء مشروعك اليوم؟",
-        'هلا': "يا هلا بك! أنا هنا لمساعدتك في تحليل السوق والبحث عن موردين.",
-        'شو': "أنا أساعدك في تحليل أفكار المشاريع (أندية، كافيهات، تقنية) وعرض اتجاهات السوق.",
-        'كيف': "ببساطة، ابحث عن مجال (مثل كافيه) وسأعطيك تقرير شامل عن السوق والموردين.",
-        'نصيح': "نصيحتي لك: ابدأ بالبحث عن فكرة تحبها. اكتب مثلاً 'Gym' في مربع البحث لترى كيف نحلل السوق لك.",
-        'وين': "ابدأ من لوحة التحكم (Dashboard) وابحث عن أي كلمة تخطر ببالك لمشروع مستقبلي.",
-        'help': "I can help you analyze a business idea, find suppliers, or give you trends. What are you thinking of starting?",
-        'lost': "Don't worry! Most entrepreneurs start here. Try searching for 'Gym' or 'Cafe' in the dashboard to see how our analysis works.",
-        'شكرا': "عفواً! أنا دائماً هنا لدعم طموحك. 🚀",
-        'thanks': "You're welcome! Let's build something great. 🚀"
-    }
+    # Smart & Friendly Logic, matched against data/chat_responses.json
+    response = CHAT_RESPONSES.match(msg)
 
-    # Default friendly guidance
-    response = "That sounds like a great path! I recommend searching for that keyword in our Dashboard to see the full market analysis and supplier matching. 📈"
-    
-    for key in responses:
-        if key in msg:
-            response = responses[key]
-            break
-            
     return jsonify({'response': response})
 
 @app.route('/search', methods=['GET', 'POST'])
@@ -173,70 +183,55 @@ def search():
             return redirect(url_for('results', keyword=keyword))
     return render_template('dashboard.html', name=current_user.username)
 
+# Shown when the social buzz source misses its deadline
+SOCIAL_PLACEHOLDER = {
+    'buzz_score': '--',
+    'platforms': ['Pending'],
+    'trending_products': [],
+    'sentiment_label': 'Data pending'
+}
+
 @app.route('/results/<keyword>')
 @login_required
 def results(keyword):
-    # 1. Get Trends (Real Data)
-    trends = get_market_trends(keyword)
-    
-    # 2. Get Finance Data
-    finance = get_financial_data(keyword)
+    # 1-2. Trends, finance and social buzz are independent network fetches
+    sources = {
+        'trends': lambda: get_market_trends(keyword),
+        'finance': lambda: get_financial_data(keyword),
+        'social': lambda: get_social_buzz(keyword),
+    }
+    if app.config['RESULTS_PARALLEL']:
+        # Started now, collected after the supplier matching below
+        pending_sources = Batch(sources)
+    else:
+        fetched = {name: fetch() for name, fetch in sources.items()}
     
     # 3. Smart Supplier Matching
-    # Find products that match the keyword (case-insensitive)
-    search_term = f"%{keyword}%"
-    matched_products = Product.query.filter(Product.name.ilike(search_term) | Product.category.ilike(search_term)).all()
-    
-    # Get unique supplier IDs from matched products
-    supplier_ids = {p.supplier_id for p in matched_products}
-    
-    if supplier_ids:
-        # Fetch only relevant suppliers
-        relevant_suppliers = Supplier.query.filter(Supplier.id.in_(supplier_ids)).all()
-    else:
-        # Fallback: Smart Logic based on Keyword
-        # Instead of showing the same top 3, pick a random set based on the keyword hash
-        # This ensures 'Gym' gets different (but consistent) suppliers than 'Fashion'
-        all_suppliers = Supplier.query.all()
-        if all_suppliers:
-            import random
-            # Use keyword to seed the selection so it's consistent for this analysis but unique per keyword
-            seed_val = sum(ord(c) for c in keyword)
-            random.seed(seed_val)
-            
-            # Select 3 to 5 random suppliers
-            sample_size = min(len(all_suppliers), random.randint(3, 5))
-            relevant_suppliers = random.sample(all_suppliers, sample_size)
-        else:
-            relevant_suppliers = []
-            
+    # Full-text match over product names, categories and supplier names,
+    # or a keyword-seeded sample when nothing matches
+    relevant_suppliers, matched = match_suppliers(keyword, app.config['RESULTS_MATCH_LIMIT'])
+    if not matched:
         flash(f'Found {len(relevant_suppliers)} matched partners for "{keyword}".', 'success')
 
     # Find user project context for preferences
     user_project = Project.query.filter_by(user_id=current_user.id, business_type=keyword).order_by(Project.created_at.desc()).first()
     preference = user_project.preference if user_project else 50
 
-    ranked_suppliers = compare_suppliers(relevant_suppliers, preference=preference)
-    
-    # Aggregate Social Buzz Data
-    from services import get_social_buzz
-    social_buzz = get_social_buzz(keyword)
+    matrix = SupplierMatrix(relevant_suppliers)
+    ranked_suppliers = matrix.ranked(preference, top=app.config['RESULTS_TOP_SUPPLIERS'])
     
-    # Analytical Context for Results
-    local_sups = [s for s in ranked_suppliers if s['is_local']]
-    intl_sups = [s for s in ranked_suppliers if not s['is_local']]
+    if app.config['RESULTS_PARALLEL']:
+        fetched, missing = pending_sources.collect(app.config['RESULTS_DEADLINES'])
+        if missing:
+            print(f"Rendering /results/{keyword} without: {', '.join(missing)}")
+    trends = fetched.get('trends', {})
+    finance = fetched.get('finance')
+    social_buzz = fetched.get('social', SOCIAL_PLACEHOLDER)
     
+    # Analytical Context for Results, over every matched supplier
     comparison_stats = {
-        'local': {
-            'avg_shipping': sum(s['shipping_raw'] for s in local_sups) / len(local_sups) if local_sups else 0,
-            'avg_tax': sum(s['tax_raw'] for s in local_sups) / len(local_sups) if local_sups else 0,
-            'count': len(local_sups)
-        },
-        'intl': {
-            'avg_shipping': sum(s['shipping_raw'] for s in intl_sups) / len(intl_sups) if intl_sups else 0,
-            'avg_tax': sum(s['tax_raw'] for s in intl_sups) / len(intl_sups) if intl_sups else 0,
-            'count': len(intl_sups)
-        }
+        'local': matrix.cost_summary(matrix.is_local),
+        'intl': matrix.cost_summary(~matrix.is_local)
     }
     
     return render_template('results.html', 
@@ -275,15 +270,85 @@ def add_supplier():
 @app.route('/report/<keyword>')
 @login_required
 def download_report(keyword):
-    trends = get_market_trends(keyword)
-    all_suppliers = Supplier.query.all()
-    ranked_suppliers = compare_suppliers(all_suppliers)
-    top_supplier = ranked_suppliers[0] if ranked_suppliers else None
+    pdf = build_keyword_report(keyword)
     
-    filename = f"report_{keyword}.pdf"
-    generate_pdf_report(keyword, trends, top_supplier, filename)
-    
-    return send_file(filename, as_attachment=True)
+    return send_file(BytesIO(pdf), mimetype='application/pdf', as_attachment=True,
+                     download_name=f"report_{keyword}.pdf")
+
+@app.route('/api/analysis/batch', methods=['POST'])
+@login_required
+def batch_analysis():
+    """
+    The /results analysis for a list of keywords, streamed as NDJSON:
+    {"keywords": [...], "preference": 50}.
+    """
+    data = request.get_json(silent=True) or {}
+    if not is_keyword_list(data.get('keywords', [])):
+        return jsonify({'error': 'keywords must be a list of strings'}), 400
+    keywords = unique_keywords(data.get('keywords') or [])
+    if not keywords:
+        return jsonify({'error': 'keywords is required'}), 400
+    if len(keywords) > MAX_BATCH_KEYWORDS:
+        return jsonify({'error': f'At most {MAX_BATCH_KEYWORDS} keywords per batch'}), 400
+    try:
+        preference = min(100, max(0, int(data.get('preference', 50))))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'preference must be a number from 0 to 100'}), 400
+
+    lines = ndjson(analyze_keywords(keywords, preference))
+    return app.response_class(stream_with_context(lines), mimetype='application/x-ndjson')
+
+@app.route('/api/reports', methods=['POST'])
+@login_required
+def submit_report_job():
+    """Queues a report: {"keyword": ...}, {"keywords": [...]} or {"project_id": ...}."""
+    data = request.get_json(silent=True) or request.form
+    if data.get('project_id'):
+        project = Project.query.filter_by(id=data.get('project_id'), user_id=current_user.id).first()
+        if project is None:
+            return jsonify({'error': 'Project not found'}), 404
+        kind, params = 'project', {'project_id': project.id}
+    else:
+        # A form repeats the field; JSON must send a list
+        keywords = data.getlist('keywords') if data is request.form else data.get('keywords')
+        keywords = keywords or ([data['keyword']] if data.get('keyword') else [])
+        if not is_keyword_list(keywords):
+            return jsonify({'error': 'keywords must be a list of strings'}), 400
+        keywords = unique_keywords(keywords)
+        if not keywords:
+            return jsonify({'error': 'keyword is required'}), 400
+        try:
+            preference = min(100, max(0, int(data.get('preference', 50))))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'preference must be a number from 0 to 100'}), 400
+        kind, params = 'keyword', {'keywords': keywords, 'preference': preference}
+
+    job = submit_report(current_user.id, kind, params)
+    status = job_status(job)
+    status['status_url'] = url_for('report_job_status', job_id=job.id)
+    status['download_url'] = url_for('download_report_job', job_id=job.id)
+    return jsonify(status), 202
+
+@app.route('/api/reports/<job_id>')
+@login_required
+def report_job_status(job_id):
+    """Job status. ``wait`` (seconds, at most jobs.MAX_WAIT) holds the reply until the job finishes."""
+    job = get_job(job_id, current_user.id, wait=request.args.get('wait', 0, type=float))
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_status(job))
+
+@app.route('/api/reports/<job_id>/download')
+@login_required
+def download_report_job(job_id):
+    job = get_job(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'done':
+        return jsonify(job_status(job)), 409
+    keywords = job.params.get('keywords') or [f"project_{job.params.get('project_id')}"]
+    return send_file(BytesIO(job.result), mimetype='application/pdf', as_attachment=True,
+                     download_name=f"report_{'_'.join(keywords)}.pdf")
 
 @app.route('/trends')
 @login_required
@@ -294,22 +359,46 @@ def trends_page():
     from services import get_advanced_trends
     trends_data = get_advanced_trends(category, timeframe)
     
+    counts = get_platform_counts()
     stats = {
-        'users': User.query.count() + 1240, 
-        'suppliers': Supplier.query.count(),
-        'projects': Project.query.count()
+        'users': counts['users'] + 1240, 
+        'suppliers': counts['suppliers'],
+        'projects': counts['projects']
     }
     
-    # Fetch suppliers for the dynamic map
-    suppliers = Supplier.query.all()
-    
-    return render_template('trends.html', 
-                         name=current_user.username, 
-                         trends=trends_data, 
-                         current_category=category, 
-                         current_timeframe=timeframe, 
-                         stats=stats,
-                         suppliers=suppliers)
+    # Map nodes are fetched page by page from /api/suppliers
+    context = dict(name=current_user.username,
+                   trends=trends_data,
+                   current_category=category,
+                   current_timeframe=timeframe,
+                   stats=stats)
+    def render():
+        if app.config['TRENDS_STREAMING'] and request.args.get('stream') != '0':
+            return app.response_class(stream_with_context(stream_template('trends.html', **context)))
+        return render_template('trends.html', **context)
+    return conditional_page(context, render)
+
+@app.route('/api/suppliers')
+@login_required
+def api_suppliers():
+    """
+    One page of supplier map nodes. ``after`` is the cursor returned as
+    ``next`` by the previous page, ``bbox`` an optional viewport as
+    south,west,north,east.
+    """
+    after = request.args.get('after', 0, type=int)
+    per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)
+    bbox = None
+    if request.args.get('bbox'):
+        try:
+            bbox = [float(v) for v in request.args['bbox'].split(',')]
+        except ValueError:
+            bbox = None
+        if not bbox or len(bbox) != 4:
+            return jsonify({'error': 'bbox must be south,west,north,east'}), 400
+
+    nodes, next_cursor = supplier_page(after, per_page, bbox)
+    return jsonify({'suppliers': nodes, 'next': next_cursor})
 
 @app.route('/cart')
 @login_required
@@ -323,4 +412,8 @@ def logout():
     return redirect(url_for('index'))
 
 if __name__ == '__main__':
+    # Run the prefetcher in-process for local development (only in the reloader child)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from scheduler import start_prefetcher
+        start_prefetcher(app)
     app.run(debug=True)
@@ -0,0 +1,116 @@
+"""
+The /results analysis for many keywords at once, as NDJSON.
+
+Keywords are deduplicated and analysed five at a time: the trend series
+and social buzz of a group come from one Google Trends request each, the
+market data from one fetch per ETF for the whole batch, and every
+keyword's line is written as soon as its group is done.
+
+Used by the /api/analysis/batch endpoint, or from the command line:
+
+    python batch.py gym cafe "coffee shop" > analysis.ndjson
+    python batch.py --file keywords.txt --preference 80
+"""
+import json
+
+from parallel import Batch
+
+MAX_KEYWORDS = 500
+GROUP_SIZE = 5  # services.TRENDS_PAYLOAD_LIMIT
+GROUP_DEADLINE = 60  # seconds to wait for a group's upstream fetches
+
+
+def is_keyword_list(value):
+    """True for a JSON list of strings (a bare string is not a list of keywords)."""
+    return isinstance(value, list) and all(isinstance(keyword, str) for keyword in value)
+
+
+def unique_keywords(keywords):
+    """Stripped keywords with repeats (ignoring case) removed, in order."""
+    seen, unique = set(), []
+    for keyword in keywords:
+        keyword = (keyword or '').strip()
+        if keyword and keyword.lower() not in seen:
+            seen.add(keyword.lower())
+            unique.append(keyword)
+    return unique
+
+
+def _supplier_rows(ranked_suppliers):
+    return [{
+        'id': entry['supplier'].id,
+        'name': entry['supplier'].name,
+        'location': entry['supplier'].location,
+        'score': entry['score'],
+        'total_cost': entry['total_cost'],
+        'is_local': entry['is_local'],
+    } for entry in ranked_suppliers]
+
+
+def analyze_keywords(keywords, preference=50):
+    """
+    Yields one analysis dict per unique keyword: trends, finance, buzz and
+    the ranked suppliers. Needs an app context.
+    """
+    from comparison import compare_suppliers
+    from search import match_suppliers
+    from services import get_financial_data_batch, get_market_trends_batch, get_social_buzz_batch
+
+    keywords = unique_keywords(keywords)
+    tickers = {}
+    for i in range(0, len(keywords), GROUP_SIZE):
+        group = keywords[i:i + GROUP_SIZE]
+        batch = Batch({
+            'trends': lambda group=group: get_market_trends_batch(group),
+            'buzz': lambda group=group: get_social_buzz_batch(group),
+            'finance': lambda group=group: get_financial_data_batch(group, tickers),
+        })
+
+        # Supplier matching runs here while the fetches are in flight
+        suppliers = {}
+        for keyword in group:
+            relevant_suppliers, matched = match_suppliers(keyword)
+            suppliers[keyword] = (compare_suppliers(relevant_suppliers, preference), matched)
+
+        fetched, missing = batch.collect(GROUP_DEADLINE)
+        for keyword in group:
+            ranked_suppliers, matched = suppliers[keyword]
+            yield {
+                'keyword': keyword,
+                'trends': fetched.get('trends', {}).get(keyword),
+                'finance': fetched.get('finance', {}).get(keyword),
+                'buzz': fetched.get('buzz', {}).get(keyword),
+                'suppliers': _supplier_rows(ranked_suppliers),
+                'suppliers_matched': matched,
+                'missing': missing,
+            }
+
+
+def ndjson(records):
+    """Encodes records as newline-delimited JSON, one line at a time."""
+    for record in records:
+        yield json.dumps(record, default=str) + '\n'
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Batch keyword analysis as NDJSON on stdout.")
+    parser.add_argument('keywords', nargs='*')
+    parser.add_argument('--file', help="file with one keyword per line")
+    parser.add_argument('--preference', type=int, default=50, help="0 (price) to 100 (quality)")
+    args = parser.parse_args()
+
+    keywords = list(args.keywords)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            keywords.extend(f.read().splitlines())
+
+    # Keep stdout for the NDJSON; the app's own messages go to stderr
+    out, sys.stdout = sys.stdout, sys.stderr
+    from app import app
+    with app.app_context():
+        for line in ndjson(analyze_keywords(keywords, args.preference)):
+            out.write(line)
+            out.flush()
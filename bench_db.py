@@ -0,0 +1,105 @@
+"""
+Read/write throughput of the SQLite profiles under concurrent workers.
+
+Each worker process opens its own engine on a scratch copy of the schema
+and, for DURATION seconds, mixes /dashboard-style reads (a user's projects,
+newest first) with /create_project-style inserts. Reports operations per
+second and "database is locked" failures for each profile.
+
+    python bench_db.py [--workers 4] [--duration 5] [--write-ratio 0.2]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import OperationalError
+
+from db_config import PROFILES, apply_pragmas
+from models import db, Project, User
+
+
+def make_engine(path, profile):
+    engine = create_engine(f'sqlite:///{path}')
+    pragmas = PROFILES[profile]
+    if pragmas:
+        event.listen(engine, 'connect', lambda conn, record: apply_pragmas(conn, pragmas))
+    return engine
+
+
+def setup(path, profile, users=50, projects=5000):
+    engine = make_engine(path, profile)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'password': 'x', 'role': 'student'}
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(Project.__table__), [
+            {'user_id': random.randint(1, users), 'name': f'Project {i}', 'business_type': 'Gym',
+             'budget': 1000.0, 'preference': 50, 'created_at': datetime.utcnow()}
+            for i in range(projects)
+        ])
+    engine.dispose()
+
+
+def worker(path, profile, duration, write_ratio, results):
+    engine = make_engine(path, profile)
+    projects = Project.__table__
+    reads = writes = locked = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        user_id = random.randint(1, 50)
+        try:
+            if random.random() < write_ratio:
+                with engine.begin() as conn:
+                    conn.execute(insert(projects).values(
+                        user_id=user_id, name='Bench', business_type='Cafe',
+                        budget=500.0, preference=50, created_at=datetime.utcnow()
+                    ))
+                writes += 1
+            else:
+                with engine.connect() as conn:
+                    conn.execute(select(projects).where(projects.c.user_id == user_id)
+                                 .order_by(projects.c.created_at.desc())).all()
+                reads += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    results.put((reads, writes, locked))
+
+
+def run(profile, workers, duration, write_ratio):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        setup(path, profile)
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=worker, args=(path, profile, duration, write_ratio, results))
+                 for _ in range(workers)]
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    reads = sum(t[0] for t in totals)
+    writes = sum(t[1] for t in totals)
+    locked = sum(t[2] for t in totals)
+    print(f"{profile:>8}: {reads / duration:9.0f} reads/s  {writes / duration:8.0f} writes/s  {locked:6d} locked errors")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, {args.duration:g}s, {args.write_ratio:.0%} writes")
+    for profile in PROFILES:
+        run(profile, args.workers, args.duration, args.write_ratio)
@@ -0,0 +1,79 @@
+"""
+Import time of the app's entry points, checked against a budget.
+
+Each module is imported in a fresh interpreter with ``-X importtime``; the
+best of several runs is compared with its budget in IMPORT_BUDGETS, and
+the heavy data-source and reporting libraries must not have been loaded
+by the import at all (they are imported on first use). Exits non-zero
+when a check fails, so it can run in CI.
+
+    python bench_imports.py [--runs 3] [--top 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Seconds each entry point may take to import (best of --runs)
+IMPORT_BUDGETS = {
+    'app': 1.0,
+    'batch': 1.0,
+    'jobs': 1.0,
+    'warmup': 1.0,
+}
+
+# Must only be imported when a fetch or a report actually needs them
+LAZY_MODULES = ['pandas', 'yfinance', 'pytrends', 'reportlab']
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(module):
+    """Returns (seconds, {imported module: cumulative seconds}, loaded lazy modules)."""
+    check = f"import sys, {module}; print('LOADED:' + ','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', check],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cumulative_us) / 1e6
+    # The import itself may print (e.g. applied migrations)
+    report = [line for line in result.stdout.splitlines() if line.startswith('LOADED:')][-1]
+    loaded = [name for name in report[len('LOADED:'):].split(',') if name]
+    return cumulative.get(module, 0.0), cumulative, loaded
+
+
+def run(runs, top):
+    failures = []
+    for module, budget in IMPORT_BUDGETS.items():
+        samples = [measure(module) for _ in range(runs)]
+        seconds, cumulative, loaded = min(samples, key=lambda sample: sample[0])
+        status = 'ok' if seconds <= budget else 'OVER BUDGET'
+        print(f"{module:<10} {seconds:6.3f}s  (budget {budget:.2f}s)  {status}")
+        if seconds > budget:
+            failures.append(f"{module} took {seconds:.3f}s")
+        if loaded:
+            print(f"           eagerly loaded: {', '.join(loaded)}")
+            failures.append(f"{module} loaded {', '.join(loaded)}")
+        if top:
+            slowest = sorted(((s, name) for name, s in cumulative.items()
+                              if '.' not in name and name != module), reverse=True)[:top]
+            for s, name in slowest:
+                print(f"           {s:6.3f}s  {name}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=0, help="also list the N slowest top-level imports")
+    args = parser.parse_args()
+
+    failures = run(args.runs, args.top)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
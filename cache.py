@@ -0,0 +1,306 @@
+"""
+TTL cache for the external data sources used in services.py.
+
+Lookups go through a small in-process LRU first and fall back to the
+TrendCache table, so results survive restarts and are shared between
+workers. Entries past their TTL are still served for a grace period while
+a background thread fetches a fresh copy (stale-while-revalidate).
+"""
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, has_app_context
+from sqlalchemy import select
+
+from models import db, TrendCache
+
+# Seconds each data source is considered fresh
+SOURCE_TTLS = {
+    'trends': 6 * 3600,
+    'advanced_trends': 3600,
+    'trending_searches': 30 * 60,
+    'buzz': 3600,
+    'finance': 15 * 60,
+    'marquee': 5 * 60,
+}
+DEFAULT_TTL = 15 * 60
+
+# Fallback data is only kept briefly so the live source is retried soon
+DEGRADED_TTL = 60
+
+# How long past its TTL an entry may still be served while refreshing
+STALE_GRACE = 24 * 3600
+
+MEMORY_SIZE = 256
+EVICT_EVERY = 50  # store writes between sweeps of expired rows
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping."""
+
+    def __init__(self, maxsize=MEMORY_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_memory = LRUCache()
+_state = threading.local()
+_inflight = set()
+_inflight_lock = threading.Lock()
+_writes = 0
+
+
+def mark_degraded():
+    """
+    Called from a fallback branch in services.py to flag that the value
+    being returned is generated data rather than a live response.
+    """
+    _state.degraded = True
+
+
+def _json_default(obj):
+    # numpy / pandas scalars
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+def _encode(value):
+    return json.dumps(value, default=_json_default, sort_keys=True)
+
+
+def _store_available():
+    return has_app_context()
+
+
+def _prefetch_enabled():
+    # When the background prefetcher owns refreshing, requests only read
+    return has_app_context() and current_app.config.get('PREFETCH_ENABLED', False)
+
+
+def _is_fresh(entry):
+    _, stored_at, ttl = entry
+    return time.time() - stored_at < ttl
+
+
+def _load(key):
+    """
+    Returns (payload, stored_at, ttl) from memory or the SQLite store. An
+    expired memory entry is checked against the store first, since another
+    worker or the prefetcher may already have refreshed it.
+    """
+    entry = _memory.get(key)
+    if entry is not None and _is_fresh(entry):
+        return entry
+    if not _store_available():
+        return entry
+
+    table = TrendCache.__table__
+    try:
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(table.c.data)
+                .where(table.c.keyword == key)
+                .order_by(table.c.updated_at.desc())
+                .limit(1)
+            ).first()
+    except Exception as e:
+        print(f"Cache read error for {key}: {e}")
+        return entry
+    if row is None or not row.data:
+        return entry
+
+    data = row.data
+    stored = (_encode(data['value']), data['stored_at'], data['ttl'])
+    if entry is not None and entry[1] >= stored[1]:
+        return entry
+    _memory.set(key, stored)
+    return stored
+
+
+def _save(key, payload, ttl):
+    global _writes
+    stored_at = time.time()
+    _memory.set(key, (payload, stored_at, ttl))
+    if not _store_available():
+        return
+
+    table = TrendCache.__table__
+    data = {'value': json.loads(payload), 'stored_at': stored_at, 'ttl': ttl}
+    now = datetime.utcnow()
+    try:
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                table.update().where(table.c.keyword == key).values(data=data, updated_at=now)
+            ).rowcount
+            if not updated:
+                conn.execute(table.insert().values(keyword=key, data=data, updated_at=now))
+    except Exception as e:
+        print(f"Cache write error for {key}: {e}")
+        return
+
+    _writes += 1
+    if _writes % EVICT_EVERY == 0:
+        evict_expired()
+
+
+def evict_expired():
+    """Deletes stored rows that are too old to be served even as stale data."""
+    horizon = max(list(SOURCE_TTLS.values()) + [DEFAULT_TTL]) + STALE_GRACE
+    cutoff = datetime.utcnow() - timedelta(seconds=horizon)
+    table = TrendCache.__table__
+    try:
+        with db.engine.begin() as conn:
+            return conn.execute(table.delete().where(table.c.updated_at < cutoff)).rowcount
+    except Exception as e:
+        print(f"Cache eviction error: {e}")
+        return 0
+
+
+def _compute(key, func, ttl, args, kwargs):
+    """Runs the wrapped function and stores its result. Returns (payload, live)."""
+    outer_degraded = getattr(_state, 'degraded', False)
+    _state.degraded = False
+    try:
+        value = func(*args, **kwargs)
+        live = not _state.degraded
+    finally:
+        # Nested cached calls report their fallbacks to the outer one
+        _state.degraded = outer_degraded or _state.degraded
+
+    payload = _encode(value)
+    _save(key, payload, ttl if live else min(ttl, DEGRADED_TTL))
+    return payload, live
+
+
+def _revalidate(key, func, ttl, args, kwargs):
+    """Refreshes an entry in a background thread, once per key at a time."""
+    with _inflight_lock:
+        if key in _inflight:
+            return
+        _inflight.add(key)
+
+    app = current_app._get_current_object() if has_app_context() else None
+
+    def run():
+        try:
+            if app is not None:
+                with app.app_context():
+                    _compute(key, func, ttl, args, kwargs)
+            else:
+                _compute(key, func, ttl, args, kwargs)
+        except Exception as e:
+            print(f"Cache refresh error for {key}: {e}")
+        finally:
+            with _inflight_lock:
+                _inflight.discard(key)
+
+    threading.Thread(target=run, name=f"cache-refresh-{key[:24]}", daemon=True).start()
+
+
+def cached(source, ttl=None):
+    """
+    Caches a services.py fetcher under a key built from its name and
+    arguments (defaults included, so the timeframe is always part of it).
+
+    The wrapped function gains a ``refresh(*args, **kwargs)`` method that
+    bypasses the cache, stores the new value and returns True when it came
+    from the live source, plus ``peek`` and ``store`` for callers that
+    fetch several entries at once.
+    """
+    ttl = ttl or SOURCE_TTLS.get(source, DEFAULT_TTL)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            raw = json.dumps(bound.arguments, sort_keys=True, default=str)
+            return f"{func.__name__}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+        def lookup(key, args, kwargs):
+            entry = _load(key)
+            if entry is None:
+                return None
+            payload, stored_at, entry_ttl = entry
+            age = time.time() - stored_at
+            if age < entry_ttl:
+                return payload
+            if age < entry_ttl + STALE_GRACE:
+                if not _prefetch_enabled():
+                    _revalidate(key, func, ttl, args, kwargs)
+                return payload
+            return None
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            payload = lookup(key, args, kwargs)
+            if payload is None:
+                payload, _ = _compute(key, func, ttl, args, kwargs)
+            return json.loads(payload)
+
+        def peek(*args, **kwargs):
+            """Returns (True, value) for a cached entry, (False, None) otherwise; never fetches."""
+            payload = lookup(make_key(args, kwargs), args, kwargs)
+            if payload is None:
+                return False, None
+            return True, json.loads(payload)
+
+        def store(value, *args, live=True, **kwargs):
+            """Caches a value fetched elsewhere (e.g. in a batch) for these arguments."""
+            _save(make_key(args, kwargs), _encode(value), ttl if live else min(ttl, DEGRADED_TTL))
+
+        def refresh(*args, **kwargs):
+            _, live = _compute(make_key(args, kwargs), func, ttl, args, kwargs)
+            return live
+
+        def invalidate(*args, **kwargs):
+            key = make_key(args, kwargs)
+            _memory.pop(key)
+            if _store_available():
+                table = TrendCache.__table__
+                with db.engine.begin() as conn:
+                    conn.execute(table.delete().where(table.c.keyword == key))
+
+        wrapper.refresh = refresh
+        wrapper.invalidate = invalidate
+        wrapper.peek = peek
+        wrapper.store = store
+        wrapper.cache_key = lambda *args, **kwargs: make_key(args, kwargs)
+        return wrapper
+
+    return decorator
@@ -1,53 +1,234 @@
-from models import Supplier
+import numpy as np
+from sqlalchemy import Numeric, bindparam, case, cast, event, func, select
 
-def compare_suppliers(suppliers, preference=50):
+from models import db, Supplier, SupplierScore
+
+# Scoring weights shared by every implementation of the supplier score
+QUALITY_POINTS = {'High': 3, 'Medium': 2}  # anything else counts as 1
+RATING_WEIGHT = 15
+QUALITY_WEIGHT = 20
+COST_WEIGHT = 0.1
+
+# Preferences for which scores are materialized in SupplierScore
+SCORE_BUCKETS = list(range(0, 101, 10))
+REFRESH_CHUNK = 5000
+
+
+# np.round(x, 2) is off from round(x, 2) by at most a cent; candidates for
+# the top N are taken this far below the N-th approximate score
+ROUNDING_MARGIN = 0.025
+
+
+def _round2(values):
+    """Rounds to 2 decimals exactly like the built-in round()."""
+    rounded = np.round(values, 2)
+    # np.round scales by 100 first, which can tip values sitting just below
+    # a half-cent the other way; defer to round() for those, once per
+    # distinct value (discrete supplier data repeats the same few)
+    scaled = values * 100
+    near = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    if len(near):
+        distinct, inverse = np.unique(values[near], return_inverse=True)
+        rounded[near] = np.array([round(float(v), 2) for v in distinct])[inverse]
+    return rounded
+
+
+class SupplierMatrix:
+    """
+    Supplier attributes held as columnar NumPy arrays so a whole set can be
+    scored and ranked in one vectorized pass.
+    """
+
+    def __init__(self, suppliers):
+        self.suppliers = list(suppliers)
+        n = len(self.suppliers)
+        self.rating = np.fromiter((s.rating or 0 for s in self.suppliers), dtype=float, count=n)
+        self.quality = np.fromiter((QUALITY_POINTS.get(s.product_quality, 1) for s in self.suppliers), dtype=float, count=n)
+        self.shipping = np.fromiter((s.shipping_cost or 0 for s in self.suppliers), dtype=float, count=n)
+        self.taxes = np.fromiter((s.taxes or 0 for s in self.suppliers), dtype=float, count=n)
+        self.is_local = np.fromiter(('Local' in (s.location or '') for s in self.suppliers), dtype=bool, count=n)
+        self.total_cost = self.shipping + self.taxes
+
+    def __len__(self):
+        return len(self.suppliers)
+
+    def raw_scores(self, preference=50):
+        """Weighted score of every supplier, before rounding."""
+        quality_weight = preference / 100.0  # 0 to 1
+        price_weight = 1.0 - quality_weight # 1 to 0
+        return (self.rating * RATING_WEIGHT
+                + self.quality * QUALITY_WEIGHT * quality_weight
+                - self.total_cost * COST_WEIGHT * price_weight)
+
+    def scores(self, preference=50):
+        """Weighted score of every supplier, rounded like the ranked output."""
+        return _round2(self.raw_scores(preference))
+
+    def rank(self, preference=50, top=None):
+        """
+        Returns the indices of the best suppliers, best first, and their
+        rounded scores (an array indexed like the suppliers). With ``top``,
+        only the top N are selected (argpartition) and only the candidates
+        near the cut are rounded exactly; other entries of the score array
+        are NaN.
+        """
+        n = len(self.suppliers)
+        if top is not None and top <= 0:
+            return np.array([], dtype=int), np.full(n, np.nan)
+        if top is None or top >= n:
+            scores = self.scores(preference)
+            return np.argsort(-scores, kind='stable'), scores
+
+        raw = self.raw_scores(preference)
+        approx = np.round(raw, 2)
+        cut = np.partition(approx, n - top)[n - top]
+        # Every supplier whose exact rounded score can reach the top N
+        candidates = np.flatnonzero(approx >= cut - ROUNDING_MARGIN)
+        scores = np.full(n, np.nan)
+        scores[candidates] = _round2(raw[candidates])
+        # Candidates are in input order, so ties keep it as a stable full sort would
+        order = np.argsort(-scores[candidates], kind='stable')[:top]
+        return candidates[order], scores
+
+    def cost_summary(self, mask):
+        """Count and average shipping and tax of the suppliers selected by a boolean mask."""
+        count = int(mask.sum())
+        return {
+            'avg_shipping': float(self.shipping[mask].mean()) if count else 0,
+            'avg_tax': float(self.taxes[mask].mean()) if count else 0,
+            'count': count
+        }
+
+    def ranked(self, preference=50, top=None):
+        indices, scores = self.rank(preference, top)
+        return [{
+            'supplier': self.suppliers[i],
+            'score': float(scores[i]),
+            'total_cost': float(self.total_cost[i]),
+            'is_local': bool(self.is_local[i]),
+            'shipping_raw': self.suppliers[i].shipping_cost,
+            'tax_raw': self.suppliers[i].taxes
+        } for i in indices]
+
+
+def compare_suppliers(suppliers, preference=50, top=None):
     """
     Ranks suppliers based on a weighted score of:
     - Price (Base Price + Shipping + Taxes) (Lower is better)
     - Quality (High=3, Medium=2, Low=1) (Higher is better)
     - Rating (Higher is better)
-    
-    Preference (0-100): 
+
+    Preference (0-100):
     - 0 focus on Price
     - 100 focus on Quality
-    
-    Returns sorted list of dictionaries with score.
-    """
-    ranked_suppliers = []
-    
-    for supplier in suppliers:
-        # Normalize Quality
-        quality_score = 1
-        if supplier.product_quality == 'High': quality_score = 3
-        elif supplier.product_quality == 'Medium': quality_score = 2
-        
-        # Calculate Total Cost
-        # Note: In a real app, base_price would come from the specific product, 
-        # here we assume a generic comparison or avg cost.
-        total_cost = supplier.shipping_cost + supplier.taxes
-        
-        # Scoring Algorithm (Weighted)
-        # weight_price increases as preference goes to 0
-        # weight_quality increases as preference goes to 100
-        quality_weight = preference / 100.0  # 0 to 1
-        price_weight = 1.0 - quality_weight # 1 to 0
-        
-        # Base stats
-        rating_impact = supplier.rating * 15 # Constant baseline
-        quality_impact = (quality_score * 20) * quality_weight
-        price_impact = (total_cost * 0.1) * price_weight
-        
-        score = rating_impact + quality_impact - price_impact
-        
-        ranked_suppliers.append({
-            'supplier': supplier,
-            'score': round(score, 2),
-            'total_cost': total_cost,
-            'is_local': 'Local' in supplier.location,
-            'shipping_raw': supplier.shipping_cost,
-            'tax_raw': supplier.taxes
-        })
-    
-    # Sort by score descending
-    ranked_suppliers.sort(key=lambda x: x['score'], reverse=True)
-    return ranked_suppliers
+
+    Returns sorted list of dictionaries with score, limited to the best
+    ``top`` entries when given.
+    """
+    # Note: In a real app, base_price would come from the specific product,
+    # here we assume a generic comparison or avg cost.
+    return SupplierMatrix(suppliers).ranked(preference, top)
+
+
+def supplier_score_expression():
+    """
+    The compare_suppliers score as a SQL expression. The preference is a
+    bound parameter, ``quality_weight`` (preference / 100).
+    """
+    quality_weight = bindparam('quality_weight', type_=db.Float)
+    quality_points = case(
+        *[(Supplier.product_quality == tier, points) for tier, points in QUALITY_POINTS.items()],
+        else_=1
+    )
+    total_cost = func.coalesce(Supplier.shipping_cost, 0) + func.coalesce(Supplier.taxes, 0)
+    return (func.coalesce(Supplier.rating, 0) * RATING_WEIGHT
+            + quality_points * QUALITY_WEIGHT * quality_weight
+            - total_cost * COST_WEIGHT * (1 - quality_weight))
+
+
+def preference_bucket(preference):
+    """The SCORE_BUCKETS entry closest to a 0-100 preference."""
+    return min(100, max(0, int(round(preference / 10.0)) * 10))
+
+
+def _score_rows(suppliers):
+    matrix = SupplierMatrix(suppliers)
+    rows = []
+    for bucket in SCORE_BUCKETS:
+        for supplier, score in zip(matrix.suppliers, matrix.scores(bucket)):
+            rows.append({'supplier_id': supplier.id, 'bucket': bucket, 'score': float(score)})
+    return rows
+
+
+def refresh_supplier_scores(connection, suppliers=None):
+    """
+    Recomputes the materialized scores of ``suppliers`` (Supplier objects or
+    rows), or rebuilds the whole table when none are given.
+    """
+    table = SupplierScore.__table__
+    if suppliers is not None:
+        ids = [s.id for s in suppliers]
+        connection.execute(table.delete().where(table.c.supplier_id.in_(ids)))
+        rows = _score_rows(suppliers)
+        if rows:
+            connection.execute(table.insert(), rows)
+        return
+
+    connection.execute(table.delete())
+    result = connection.execute(select(Supplier.__table__).order_by(Supplier.id))
+    while True:
+        chunk = result.fetchmany(REFRESH_CHUNK)
+        if not chunk:
+            break
+        connection.execute(table.insert(), _score_rows(chunk))
+
+
+def ensure_supplier_scores(connection):
+    """Backfills the materialized scores once, for databases created before them."""
+    has_scores = connection.execute(select(SupplierScore.supplier_id).limit(1)).first()
+    has_suppliers = connection.execute(select(Supplier.id).limit(1)).first()
+    if has_suppliers and not has_scores:
+        refresh_supplier_scores(connection)
+
+
+# Keep the materialized scores in step with every supplier write
+@event.listens_for(Supplier, 'after_insert')
+@event.listens_for(Supplier, 'after_update')
+def _refresh_supplier_score(mapper, connection, target):
+    refresh_supplier_scores(connection, [target])
+
+
+@event.listens_for(Supplier, 'after_delete')
+def _delete_supplier_score(mapper, connection, target):
+    table = SupplierScore.__table__
+    connection.execute(table.delete().where(table.c.supplier_id == target.id))
+
+
+def top_suppliers(k=1, preference=50, query=None):
+    """
+    Returns the best ``k`` suppliers without loading the rest, in the same
+    shape as compare_suppliers. ``query`` optionally narrows the candidates
+    (a Supplier query).
+
+    Candidates are ordered by their materialized score for the closest
+    preference bucket (an index range scan); the k rows found are then
+    scored exactly for ``preference``. Without materialized scores the
+    ranking falls back to scoring in SQL.
+    """
+    base = (query or Supplier.query).with_entities(Supplier.id)
+    ids = [row.id for row in base
+           .join(SupplierScore, SupplierScore.supplier_id == Supplier.id)
+           .filter(SupplierScore.bucket == preference_bucket(preference))
+           .order_by(SupplierScore.score.desc(), SupplierScore.supplier_id)
+           .limit(k)]
+    if not ids:
+        score = supplier_score_expression()
+        ids = [row.id for row in base
+               # PostgreSQL only rounds to a number of places on numeric
+               .order_by(func.round(cast(score, Numeric), 2).desc(), Supplier.id)
+               .limit(k)
+               .params(quality_weight=preference / 100.0)]
+    if not ids:
+        return []
+    suppliers = Supplier.query.filter(Supplier.id.in_(ids)).order_by(Supplier.id).all()
+    return compare_suppliers(suppliers, preference)
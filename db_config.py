@@ -0,0 +1,119 @@
+"""
+SQLite engine profile: connection pragmas and pool settings.
+
+Every new SQLite connection gets WAL journaling (readers no longer block
+on writers), synchronous=NORMAL, a memory-mapped I/O window, a larger page
+cache, in-memory temp tables and a busy timeout, so concurrent gunicorn
+workers wait for a lock instead of failing with "database is locked".
+
+Profiles are picked with the SQLITE_PROFILE config value / environment
+variable ('tuned' by default, 'default' leaves SQLite as is), and
+individual pragmas can be overridden through SQLITE_PRAGMAS.
+
+Read routes can also use a separate read-only bind (see routing.py): set
+SQLALCHEMY_REPLICA_URI, or READ_REPLICA=1 to open the primary SQLite file
+again through a read-only URI.
+"""
+import os
+
+from sqlalchemy import event
+
+from models import db
+from routing import REPLICA
+
+PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative means KiB: 64 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,  # milliseconds
+    },
+}
+
+# Replica connections only read, and must not try to change the journal mode
+READ_ONLY_PRAGMAS = ('mmap_size', 'cache_size', 'temp_store', 'busy_timeout')
+
+# SQLAlchemy pool settings for file-backed SQLite
+POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+    'pool_pre_ping': True,
+}
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def profile_pragmas(app, profile=None):
+    profile = profile or app.config.get('SQLITE_PROFILE') or os.environ.get('SQLITE_PROFILE', 'tuned')
+    pragmas = dict(PROFILES[profile])
+    pragmas.update(app.config.get('SQLITE_PRAGMAS', {}))
+    return pragmas
+
+
+def database_uri(url=None):
+    """The primary database URI, from DATABASE_URL when set."""
+    url = url or os.environ.get('DATABASE_URL', 'sqlite:///database.db')
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def replica_uri(primary_uri):
+    """
+    The read replica URI: DATABASE_REPLICA_URL when set, or with
+    READ_REPLICA=1 a read-only URI to the primary SQLite file.
+    """
+    if os.environ.get('DATABASE_REPLICA_URL'):
+        return database_uri(os.environ['DATABASE_REPLICA_URL'])
+    if os.environ.get('READ_REPLICA') == '1' and primary_uri.startswith('sqlite:///'):
+        return f"sqlite:///file:{primary_uri[len('sqlite:///'):]}?mode=ro&uri=true"
+    return None
+
+
+def _is_sqlite_file(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri != 'sqlite://'
+
+
+def init_db(app, profile=None):
+    """
+    Initializes ``models.db`` for the app: the replica bind when configured,
+    pool options for file databases and the SQLite profile pragmas on every
+    new connection. Other database backends are initialized untouched.
+    """
+    pragmas = profile_pragmas(app, profile)
+
+    replica = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if replica:
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA] = replica
+
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if pragmas and _is_sqlite_file(uri):
+        options = dict(POOL_OPTIONS)
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    db.init_app(app)
+
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite' or not pragmas:
+                continue
+            if key == REPLICA:
+                engine_pragmas = {k: v for k, v in pragmas.items() if k in READ_ONLY_PRAGMAS}
+                engine_pragmas['query_only'] = 'ON'
+            else:
+                engine_pragmas = pragmas
+            event.listen(engine, 'connect', lambda conn, record, p=engine_pragmas: apply_pragmas(conn, p))
@@ -0,0 +1,100 @@
+"""
+Rendered-output caching for the data-heavy pages.
+
+``{% cache 'name', data... %}...{% endcache %}`` in a template renders its
+body once per version of the data it is given and reuses the HTML after
+that. The version is a hash of the data itself, so a fragment re-renders
+exactly when the marquee, sector summaries or trend rows behind it change.
+Anything outside a cache block (the user's projects, flashed messages)
+renders fresh on every request.
+
+``conditional_page`` adds ETag and Last-Modified headers to a page built
+from a set of inputs and answers 304 Not Modified, without rendering, when
+the browser already has that version.
+"""
+import hashlib
+import json
+import time
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from cache import LRUCache
+
+FRAGMENT_CACHE_SIZE = 256
+PAGE_VERSIONS_SIZE = 4096
+
+_fragments = LRUCache(FRAGMENT_CACHE_SIZE)
+# ETag -> when that version of a page was first served (its Last-Modified)
+_page_versions = LRUCache(PAGE_VERSIONS_SIZE)
+
+
+def data_version(*parts):
+    """A short hash identifying a set of template inputs."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _fragment_cache_enabled():
+    # Edited templates must show up at once while developing
+    return current_app.config.get('FRAGMENT_CACHE', True) and not current_app.debug
+
+
+class FragmentCacheExtension(Extension):
+    """The ``{% cache %}`` tag."""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_render_fragment', [nodes.List(parts)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render_fragment(self, parts, caller):
+        if not _fragment_cache_enabled():
+            return caller()
+        key = data_version(*parts)
+        html = _fragments.get(key)
+        if html is None:
+            html = caller()
+            _fragments.set(key, html)
+        return html
+
+
+def conditional_page(inputs, render):
+    """
+    Returns ``render()`` with ETag and Last-Modified headers for ``inputs``
+    (everything the page shows), or a 304 when the request's validators
+    match. Pages with pending flashed messages are always rendered.
+    """
+    if session.get('_flashes'):
+        return render()
+
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+    etag = data_version(request.full_path, user_id, inputs)
+    last_modified = _page_versions.get(etag)
+    if last_modified is None:
+        last_modified = int(time.time())
+        _page_versions.set(etag, last_modified)
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        not_modified = since is not None and since.timestamp() >= last_modified
+
+    if not_modified:
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Browsers keep the page but check it with us before every reuse
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,29 @@
+"""
+gunicorn settings for the web process (``gunicorn app:app`` picks this file
+up from the working directory).
+
+The app is loaded once in the master and warmed up there (templates
+compiled, heavy libraries imported, schema checked) before the workers are
+forked, so every worker serves its first request warm.
+
+Concurrency is left to gunicorn's defaults: one sync worker unless
+WEB_CONCURRENCY (or --workers) says otherwise. Keep in mind that the
+Google rate limiter (sessions.py) and the report pool (REPORT_WORKERS)
+are per process, so each added worker adds another of both.
+"""
+preload_app = True
+
+
+def when_ready(server):
+    from app import app
+    from warmup import warm_up
+    warm_up(app)
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the workers
+    from app import app
+    from models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
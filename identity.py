@@ -0,0 +1,163 @@
+"""
+User loading for Flask-Login without a database query per request.
+
+``load_user`` returns a Principal: the id, username and role of the user,
+which is all the routes and templates read. It is taken, in order, from a
+compact copy kept in the session, from a per-process LRU of recent users,
+and only then from the User table. Both copies expire after a short TTL.
+
+Updating or deleting a user records the time in the user_change table.
+A session copy loaded before the user's last change is not trusted, and
+the process copy is dropped. The process that made the change knows at
+once; every other process reads new user_change rows at most every
+INVALIDATION_POLL seconds, so no request queries the User table.
+
+Any other User attribute read from a Principal loads the full record.
+"""
+import threading
+import time
+
+from flask import has_request_context, session
+from flask_login import UserMixin, user_logged_in, user_logged_out
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import LRUCache
+from models import db, User, UserChange
+
+USER_CACHE_SIZE = 1024
+USER_TTL = 60  # seconds a user record is reused by this process
+SESSION_TTL = 300  # seconds the session copy is trusted before reloading
+SESSION_KEY = '_principal'
+INVALIDATION_POLL = 5  # seconds between reads of other processes' user changes
+
+FIELDS = ('id', 'username', 'role')
+
+_users = LRUCache(USER_CACHE_SIZE)
+# user id -> when its cached copies stopped being valid
+_invalidated = {}
+_polled_at = 0
+_poll_lock = threading.Lock()
+
+
+class Principal(UserMixin):
+    """The logged-in user's identity, without the rest of the record."""
+
+    def __init__(self, id, username, role):
+        self.id = id
+        self.username = username
+        self.role = role
+
+    def __getattr__(self, name):
+        # Only called for attributes a Principal does not carry
+        if name.startswith('_'):
+            raise AttributeError(name)
+        user = self.__dict__.get('_user')
+        if user is None:
+            user = self.__dict__['_user'] = db.session.get(User, self.id)
+        return getattr(user, name)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+def _principal_of(user):
+    return {field: getattr(user, field) for field in FIELDS}
+
+
+def _remember(data):
+    """Stores the principal in the session, stamped with when it was loaded."""
+    if has_request_context():
+        session[SESSION_KEY] = dict(data, at=time.time())
+
+
+def _poll_changes():
+    """Picks up users changed by other processes since the last poll."""
+    global _polled_at
+    if time.time() - _polled_at < INVALIDATION_POLL or not _poll_lock.acquire(blocking=False):
+        return
+    try:
+        # Look back a little: a change committed during the last poll may
+        # carry a time just before it
+        now = time.time()
+        since = max(_polled_at - INVALIDATION_POLL, now - SESSION_TTL)
+        table = UserChange.__table__
+        with db.engine.connect() as conn:
+            rows = conn.execute(select(table.c.user_id, table.c.changed_at)
+                                .where(table.c.changed_at > since)).all()
+        for user_id, changed_at in rows:
+            _invalidate(user_id, changed_at)
+        # Copies older than SESSION_TTL are rejected anyway
+        for user_id, changed_at in list(_invalidated.items()):
+            if now - changed_at > SESSION_TTL:
+                _invalidated.pop(user_id, None)
+        _polled_at = now
+    except SQLAlchemyError as e:
+        print(f"User change poll failed: {e}")
+    finally:
+        _poll_lock.release()
+
+
+def _invalidate(user_id, changed_at):
+    if changed_at > _invalidated.get(user_id, 0):
+        _invalidated[user_id] = changed_at
+        entry = _users.get(user_id)
+        if entry is not None and entry[1] <= changed_at:
+            _users.pop(user_id)
+
+
+def load_user(user_id):
+    """Flask-Login user_loader: session copy, then process cache, then database."""
+    user_id = int(user_id)
+    _poll_changes()
+
+    data = session.get(SESSION_KEY) if has_request_context() else None
+    if (data and data.get('id') == user_id and time.time() - data.get('at', 0) < SESSION_TTL
+            and data.get('at', 0) > _invalidated.get(user_id, 0)):
+        return Principal(**{field: data[field] for field in FIELDS})
+
+    entry = _users.get(user_id)
+    if entry is None or time.time() - entry[1] >= USER_TTL:
+        user = db.session.get(User, user_id)
+        if user is None:
+            _users.pop(user_id)
+            return None
+        entry = (_principal_of(user), time.time())
+        _users.set(user_id, entry)
+
+    _remember(entry[0])
+    return Principal(**entry[0])
+
+
+def forget_user(user_id, changed_at=None):
+    """
+    Stops trusting the cached copies of a user made before now (or
+    ``changed_at``): in this process, and in any session that carries one.
+    """
+    _invalidate(user_id, changed_at or time.time())
+    if has_request_context() and (session.get(SESSION_KEY) or {}).get('id') == user_id:
+        session.pop(SESSION_KEY, None)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    changed_at = time.time()
+    forget_user(target.id, changed_at)
+    # Shared with the other processes, in the same transaction as the change
+    table = UserChange.__table__
+    connection.execute(delete(table).where(table.c.user_id == target.id))
+    connection.execute(insert(table).values(user_id=target.id, changed_at=changed_at))
+
+
+@user_logged_in.connect
+def _logged_in(app, user, **extra):
+    data = _principal_of(user)
+    _users.set(data['id'], (data, time.time()))
+    _remember(data)
+
+
+@user_logged_out.connect
+def _logged_out(app, user, **extra):
+    if has_request_context():
+        session.pop(SESSION_KEY, None)
@@ -0,0 +1,178 @@
+"""
+Background report jobs.
+
+A report request is stored as a ReportJob row and rendered in a local
+process pool, so slow trend fetches and PDF rendering never hold a web
+worker. Clients submit a job, poll its status and download the PDF once
+it is done.
+
+Jobs are persisted in the database: a job is claimed atomically before it
+runs, so resubmitting one (after a restart, or from several web workers)
+never renders it twice, and queued or abandoned jobs are picked up again
+when a pool starts.
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import update
+
+from models import db, Project, ReportJob
+
+KINDS = ('keyword', 'project')
+REPORT_WORKERS = 2  # override with the REPORT_WORKERS config value
+JOB_TIMEOUT = 10 * 60  # seconds before a running job counts as abandoned
+JOB_RETENTION = 24 * 3600  # seconds finished jobs (and their PDFs) are kept
+POLL_INTERVAL = 0.5
+MAX_WAIT = 2  # longest wait of a status request; it holds a server thread
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    """The process pool, created (and pending jobs resumed) on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = current_app.config.get('REPORT_WORKERS', REPORT_WORKERS)
+            # spawn: workers must not inherit the web process's DB connections
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+            for job_id in _resumable_jobs():
+                _pool.submit(run_job, job_id)
+    return _pool
+
+
+def _submit(job_id):
+    pool = _executor()
+    try:
+        pool.submit(run_job, job_id)
+    except BrokenProcessPool:
+        # A worker died; start a new pool, which resumes every queued job (this one too)
+        print(f"Report pool broken, restarting it for job {job_id}")
+        _discard(pool)
+        _executor()
+
+
+def _discard(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _resumable_jobs():
+    abandoned = datetime.utcnow() - timedelta(seconds=JOB_TIMEOUT)
+    db.session.execute(
+        update(ReportJob)
+        .where(ReportJob.status == 'running', ReportJob.started_at < abandoned)
+        .values(status='queued', started_at=None)
+    )
+    db.session.commit()
+    return [row.id for row in db.session.query(ReportJob.id)
+            .filter(ReportJob.status == 'queued')
+            .order_by(ReportJob.created_at)]
+
+
+def submit_report(user_id, kind, params):
+    """Stores a report job and queues it on the pool. Returns the job."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown report kind: {kind}")
+    job = ReportJob(id=uuid.uuid4().hex, user_id=user_id, kind=kind, params=params)
+    db.session.add(job)
+    db.session.commit()
+    _submit(job.id)
+    return job
+
+
+def get_job(job_id, user_id, wait=0):
+    """
+    The user's job, or None. With ``wait``, blocks up to that many seconds
+    (at most MAX_WAIT) while the job is still queued or running.
+    """
+    deadline = time.time() + min(wait, MAX_WAIT)
+    while True:
+        job = db.session.query(ReportJob).filter_by(id=job_id, user_id=user_id).first()
+        if job is None or job.status in ('done', 'failed') or time.time() >= deadline:
+            return job
+        # End the read transaction so the next poll sees the worker's commit
+        db.session.rollback()
+        time.sleep(POLL_INTERVAL)
+
+
+def job_status(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'params': job.params,
+        'status': job.status,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def purge_finished_jobs(retention=JOB_RETENTION):
+    """Deletes finished jobs older than ``retention`` seconds."""
+    cutoff = datetime.utcnow() - timedelta(seconds=retention)
+    with db.engine.begin() as conn:
+        conn.execute(ReportJob.__table__.delete().where(
+            ReportJob.status.in_(['done', 'failed']), ReportJob.finished_at < cutoff
+        ))
+    return True
+
+
+def build_report(kind, params):
+    """Renders the PDF for a job's kind and parameters."""
+    from reports import build_keyword_report
+
+    preference = params.get('preference', 50)
+    if kind == 'project':
+        project = db.session.get(Project, params['project_id'])
+        if project is None:
+            raise ValueError(f"Project {params['project_id']} not found")
+        keywords, preference = [project.business_type], project.preference or 50
+    else:
+        keywords = params.get('keywords') or []
+    if len(keywords) != 1:
+        raise ValueError("Reports currently cover exactly one keyword")
+
+    return build_keyword_report(keywords[0], preference)
+
+
+def _claim(job_id):
+    claimed = db.session.execute(
+        update(ReportJob)
+        .where(ReportJob.id == job_id, ReportJob.status == 'queued')
+        .values(status='running', started_at=datetime.utcnow())
+    ).rowcount
+    db.session.commit()
+    return claimed == 1
+
+
+def run_job(job_id):
+    """Pool entry point: claims a queued job, renders it and stores the outcome."""
+    from app import app
+
+    with app.app_context():
+        if not _claim(job_id):
+            return False
+        job = db.session.get(ReportJob, job_id)
+        try:
+            job.result = build_report(job.kind, job.params)
+            job.status = 'done'
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ReportJob, job_id)
+            print(f"Report job {job_id} failed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return job.status == 'done'
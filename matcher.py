@@ -0,0 +1,123 @@
+"""
+Keyword matching against large phrase lists.
+
+A KeywordMatcher compiles its phrases into an Aho-Corasick automaton once,
+then finds every phrase occurring in a text in a single pass, so matching
+time grows with the length of the text rather than the number of phrases.
+When several phrases occur, the best one wins: highest priority first,
+then the longest phrase, then the one appearing earliest.
+
+Phrase lists live in JSON data files:
+
+    {
+        "default": "EURUSD=X",
+        "entries": [
+            {"match": "tech", "value": "XLK"},
+            {"match": "hi", "value": "Hello!", "whole_word": true, "priority": 0}
+        ]
+    }
+
+Matching ignores case; ``whole_word`` entries only match when not part of
+a longer word.
+"""
+import json
+import os
+from collections import deque
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+class Entry:
+    def __init__(self, phrase, value, priority=0, whole_word=False):
+        self.phrase = phrase.casefold()
+        self.value = value
+        self.priority = priority
+        self.whole_word = whole_word
+
+
+class KeywordMatcher:
+    def __init__(self, entries, default=None):
+        self.entries = [e for e in entries if e.phrase]
+        self.default = default
+        self._build()
+
+    def _build(self):
+        # Trie: per-state transitions and the entries ending there
+        self._goto = [{}]
+        self._out = [[]]
+        for index, entry in enumerate(self.entries):
+            state = 0
+            for char in entry.phrase:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Failure links, breadth first; outputs inherit those of their fallback
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(char, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        """Yields (start, entry) for every phrase occurring in ``text``."""
+        text = (text or '').casefold()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                entry = self.entries[index]
+                start = position - len(entry.phrase) + 1
+                if entry.whole_word and not _is_whole_word(text, start, position + 1):
+                    continue
+                yield start, entry
+
+    def best(self, text):
+        """The best matching entry, or None."""
+        best, best_key = None, None
+        for start, entry in self.find_all(text):
+            key = (entry.priority, len(entry.phrase), -start)
+            if best_key is None or key > best_key:
+                best, best_key = entry, key
+        return best
+
+    def match(self, text, default=None):
+        """The value of the best matching phrase, or the default."""
+        entry = self.best(text)
+        if entry is None:
+            return default if default is not None else self.default
+        return entry.value
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _is_whole_word(text, start, end):
+    before = text[start - 1] if start > 0 else ''
+    after = text[end] if end < len(text) else ''
+    return not (before.isalnum() or after.isalnum())
+
+
+def load_matcher(name):
+    """Builds a KeywordMatcher from a JSON file (a path, or a name in data/)."""
+    path = name if os.path.sep in name else os.path.join(DATA_DIR, name)
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    entries = [Entry(item['match'], item['value'], item.get('priority', 0), item.get('whole_word', False))
+               for item in spec.get('entries', [])]
+    return KeywordMatcher(entries, spec.get('default'))
@@ -0,0 +1,112 @@
+"""
+Versioned schema migrations.
+
+``db.create_all()`` only creates missing tables; it never adds indexes,
+triggers or data to tables that already exist. Changes that existing
+databases must pick up are registered here as numbered migrations and
+applied once each, in order, recording their version in the
+``schema_migrations`` table.
+
+Migrations are frozen once released: change the schema by adding a new
+one rather than editing an old one. Apply pending migrations with
+``python migrations.py`` (the app also applies them on start).
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.exc import IntegrityError
+
+from models import db
+
+_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+@migration(1, 'Secondary indexes for dashboard, results, catalog and cache lookups')
+def _add_secondary_indexes(conn):
+    for statement in [
+        "CREATE INDEX IF NOT EXISTS ix_project_user_created ON project (user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_project_user_type_created ON project (user_id, business_type, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_product_supplier_id ON product (supplier_id)",
+        "CREATE INDEX IF NOT EXISTS ix_product_category ON product (category)",
+        "CREATE INDEX IF NOT EXISTS ix_supplier_location ON supplier (location)",
+        "CREATE INDEX IF NOT EXISTS ix_supplier_scoring ON supplier (rating, product_quality, shipping_cost, taxes)",
+        "CREATE INDEX IF NOT EXISTS ix_trend_cache_keyword ON trend_cache (keyword)",
+    ]:
+        conn.execute(text(statement))
+
+
+@migration(2, 'Full-text catalog index')
+def _add_catalog_search(conn):
+    from search import init_search_index
+    init_search_index(conn)
+
+
+@migration(3, 'Backfill materialized supplier scores')
+def _backfill_supplier_scores(conn):
+    from comparison import ensure_supplier_scores
+    ensure_supplier_scores(conn)
+
+
+@migration(4, 'Fill platform counters')
+def _fill_platform_counters(conn):
+    from stats import reconcile
+    reconcile(conn)
+
+
+def current_version(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return conn.execute(select(db.func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def upgrade(engine=None):
+    """Applies pending migrations, each in its own transaction. Returns the versions applied."""
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    applied = []
+    for number, description, fn in MIGRATIONS:
+        if number <= version:
+            continue
+        try:
+            with engine.begin() as conn:
+                fn(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=number, description=description, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another worker applied it first; every migration is idempotent
+            continue
+        print(f"Applied migration {number}: {description}")
+        applied.append(number)
+    return applied
+
+
+def init_schema():
+    """Creates missing tables, then brings existing ones up to date."""
+    db.create_all()
+    return upgrade()
+
+
+if __name__ == '__main__':
+    from app import app
+    with app.app_context():
+        applied = init_schema()
+        with db.engine.connect() as conn:
+            print(f"Schema at version {current_version(conn)} ({len(applied)} applied).")
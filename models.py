@@ -1,8 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -15,19 +16,34 @@ class User(db.Model, UserMixin):
 class Supplier(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
-    location = db.Column(db.String(100)) # local, global
+    location = db.Column(db.String(100), index=True) # local, global
     contact_info = db.Column(db.String(500))
     rating = db.Column(db.Float, default=0.0)
     product_quality = db.Column(db.String(50)) # High, Medium, Low
     shipping_cost = db.Column(db.Float)
     taxes = db.Column(db.Float)
 
+    __table_args__ = (
+        # Covers every column of the ranking score, so top-k ranking in SQL
+        # scans the index instead of the table
+        db.Index('ix_supplier_scoring', 'rating', 'product_quality', 'shipping_cost', 'taxes'),
+    )
+
+class SupplierScore(db.Model):
+    """compare_suppliers score of a supplier, precomputed per preference bucket."""
+    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True) # preference rounded to the nearest 10
+    score = db.Column(db.Float, nullable=False)
+
+# Ranking reads one bucket in score order
+db.Index('ix_supplier_score_rank', SupplierScore.bucket, SupplierScore.score.desc(), SupplierScore.supplier_id)
+
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
-    category = db.Column(db.String(100))
+    category = db.Column(db.String(100), index=True)
     base_price = db.Column(db.Float)
-    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'))
+    supplier_id = db.Column(db.Integer, db.ForeignKey('supplier.id'), index=True)
 
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -40,6 +56,13 @@ class Project(db.Model):
     preference = db.Column(db.Integer, default=50) # 0: Cheapest, 100: Best Quality
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # /dashboard: a user's projects, newest first
+        db.Index('ix_project_user_created', 'user_id', 'created_at'),
+        # /results: a user's latest project of a business type
+        db.Index('ix_project_user_type_created', 'user_id', 'business_type', 'created_at'),
+    )
+
     @property
     def readiness_score(self):
         """Calculates real progress percentage based on filled data."""
@@ -53,6 +76,34 @@ class Project(db.Model):
 
 class TrendCache(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    keyword = db.Column(db.String(100))
+    keyword = db.Column(db.String(100), index=True)
     data = db.Column(db.JSON)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class UserChange(db.Model):
+    """When a user was last updated or deleted (see identity.py)."""
+    user_id = db.Column(db.Integer, primary_key=True)
+    changed_at = db.Column(db.Float, nullable=False, index=True) # epoch seconds
+
+class PlatformStat(db.Model):
+    """Named counter maintained by stats.py."""
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class ReportJob(db.Model):
+    """A report rendered in the background by jobs.py."""
+    id = db.Column(db.String(32), primary_key=True) # random hex token
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    kind = db.Column(db.String(20), nullable=False) # keyword, project
+    params = db.Column(db.JSON, nullable=False) # e.g. {"keywords": [...]} or {"project_id": 1}
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, running, done, failed
+    result = db.Column(db.LargeBinary)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # Resuming queued jobs and purging old ones
+        db.Index('ix_report_job_status_created', 'status', 'created_at'),
+    )
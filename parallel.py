@@ -0,0 +1,80 @@
+"""
+Runs independent slow calls (network fetches, mostly) side by side on a
+shared thread pool, waiting no longer than a fixed deadline.
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import wraps
+
+from flask import current_app, has_app_context
+
+MAX_WORKERS = 16
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fetch')
+
+
+def _with_app_context(app, fn):
+    @wraps(fn)
+    def run():
+        with app.app_context():
+            return fn()
+    return run
+
+
+class Batch:
+    """
+    A set of calls started together. Start it, do other work on the
+    calling thread, then ``collect`` whatever has finished.
+    """
+
+    def __init__(self, tasks):
+        if has_app_context():
+            app = current_app._get_current_object()
+            tasks = {name: _with_app_context(app, fn) for name, fn in tasks.items()}
+
+        self.started = time.monotonic()
+        self.futures = {name: _pool.submit(fn) for name, fn in tasks.items()}
+
+    def collect(self, deadline):
+        """
+        Waits for the calls, each for at most its deadline in seconds since
+        the batch started. ``deadline`` is a number, or a dict of name ->
+        seconds for per-call limits.
+
+        Returns ``(results, missing)``: a dict of name -> result for the calls
+        that finished in time, and the names of those that timed out or raised.
+        Calls still running past their deadline are left to finish in the
+        background; their results are discarded.
+        """
+        if isinstance(deadline, dict):
+            limits = deadline
+        else:
+            limits = dict.fromkeys(self.futures, deadline)
+
+        results, missing = {}, []
+        pending = dict(self.futures)
+        while pending:
+            elapsed = time.monotonic() - self.started
+            for name in [n for n, f in pending.items() if f.done() or limits[n] <= elapsed]:
+                future = pending.pop(name)
+                if not future.done():
+                    future.cancel()
+                    missing.append(name)
+                elif future.exception() is not None:
+                    print(f"Fetch error for {name}: {future.exception()}")
+                    missing.append(name)
+                else:
+                    results[name] = future.result()
+
+            if pending:
+                timeout = min(limits[n] for n in pending) - (time.monotonic() - self.started)
+                wait(pending.values(), timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+        return results, missing
+
+
+def gather(tasks, deadline):
+    """
+    Runs each callable in ``tasks`` (a dict of name -> zero-arg callable)
+    concurrently and waits for them as described in ``Batch.collect``.
+    """
+    return Batch(tasks).collect(deadline)
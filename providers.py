@@ -0,0 +1,180 @@
+"""
+Where services.py gets its upstream data: Google Trends and Yahoo Finance.
+
+Three providers answer the same three questions (interest over time for up
+to five keywords, today's trending searches, a ticker's price history):
+
+- ``live`` asks Google and Yahoo (the default).
+- ``record`` asks them too, and saves every answer as a fixture file.
+- ``replay`` answers from the fixture files only and never opens a
+  connection. A request with no fixture fails at once, so services.py
+  uses its usual fallback data instead of waiting for a network timeout.
+
+The provider is picked with the DATA_PROVIDER environment variable and
+fixtures live in DATA_FIXTURES (``fixtures/`` by default), one small JSON
+file per request. To record a set for CI or a load test, run the code
+paths once against the live services, e.g.
+
+    DATA_PROVIDER=record python batch.py gym fashion tech
+    DATA_PROVIDER=replay python batch.py gym fashion tech
+
+Replayed data comes back as the same pandas objects pytrends and yfinance
+return, so everything after the fetch runs exactly as it does live.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from cache import LRUCache
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_CACHE_SIZE = 512
+HISTORY_COLUMNS = ['Close']  # price history columns the app reads, and records
+
+
+class FixtureMissing(Exception):
+    """Replay was asked for a request that was never recorded."""
+
+
+def _frame(data):
+    import pandas as pd
+    if data.get('tz'):
+        # Offsets differ across a DST change, so go through UTC
+        index = pd.to_datetime(data['index'], utc=True).tz_convert(data['tz'])
+    else:
+        index = pd.to_datetime(data['index'])
+    return pd.DataFrame(data['columns'], index=index.rename(data.get('index_name')))
+
+
+def _columns(df, columns=None):
+    columns = [c for c in (columns or df.columns) if c in df]
+    return {
+        'index': [k.isoformat() for k in df.index],
+        'index_name': df.index.name,
+        'tz': str(df.index.tz) if getattr(df.index, 'tz', None) else None,
+        'columns': {str(c): df[c].tolist() for c in columns},
+    }
+
+
+class LiveProvider:
+    name = 'live'
+
+    def interest_over_time(self, keywords, timeframe):
+        """Google Trends interest for up to five keywords, as pytrends returns it."""
+        from sessions import trend_client
+        pytrends = trend_client()
+        pytrends.build_payload(list(keywords), cat=0, timeframe=timeframe, geo='', gprop='')
+        return pytrends.interest_over_time()
+
+    def trending_searches(self, country):
+        """Today's trending searches in a country (pytrends' ``pn`` name)."""
+        from sessions import trend_client
+        return trend_client().trending_searches(pn=country)[0].tolist()
+
+    def ticker_history(self, symbol, period, interval='1d', timeout=None):
+        """A ticker's price history, as yfinance returns it."""
+        from sessions import ticker_history
+        kwargs = {'timeout': timeout} if timeout else {}
+        return ticker_history(symbol, period=period, interval=interval, **kwargs)
+
+
+class FixtureStore:
+    """Fixture files, one per request, named by a hash of the request."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._loaded = LRUCache(FIXTURE_CACHE_SIZE)
+
+    def path(self, kind, request):
+        digest = hashlib.sha1(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, kind, f"{digest}.json")
+
+    def load(self, kind, request):
+        path = self.path(kind, request)
+        fixture = self._loaded.get(path)
+        if fixture is None:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    fixture = json.load(f)
+            except FileNotFoundError:
+                raise FixtureMissing(f"No {kind} fixture for {request}")
+            self._loaded.set(path, fixture)
+        return fixture['response']
+
+    def save(self, kind, request, response):
+        path = self.path(kind, request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written under a temporary name so a concurrent replay never reads half a file
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump({'request': request, 'response': response}, f, separators=(',', ':'))
+        os.replace(temp, path)
+        self._loaded.set(path, {'request': request, 'response': response})
+
+
+class ReplayProvider:
+    name = 'replay'
+
+    def __init__(self, directory=DEFAULT_FIXTURES):
+        self.store = FixtureStore(directory)
+
+    def interest_over_time(self, keywords, timeframe):
+        return _frame(self.store.load('trends', {'keywords': list(keywords), 'timeframe': timeframe}))
+
+    def trending_searches(self, country):
+        return list(self.store.load('trending', {'country': country}))
+
+    def ticker_history(self, symbol, period, interval='1d', timeout=None):
+        return _frame(self.store.load('history', {'symbol': symbol, 'period': period, 'interval': interval}))
+
+
+class RecordingProvider:
+    name = 'record'
+
+    def __init__(self, directory=DEFAULT_FIXTURES, live=None):
+        self.store = FixtureStore(directory)
+        self.live = live or LiveProvider()
+
+    def interest_over_time(self, keywords, timeframe):
+        df = self.live.interest_over_time(keywords, timeframe)
+        self.store.save('trends', {'keywords': list(keywords), 'timeframe': timeframe}, _columns(df))
+        return df
+
+    def trending_searches(self, country):
+        searches = self.live.trending_searches(country)
+        self.store.save('trending', {'country': country}, searches)
+        return searches
+
+    def ticker_history(self, symbol, period, interval='1d', timeout=None):
+        df = self.live.ticker_history(symbol, period, interval, timeout)
+        self.store.save('history', {'symbol': symbol, 'period': period, 'interval': interval},
+                        _columns(df, HISTORY_COLUMNS))
+        return df
+
+
+PROVIDERS = {
+    'live': lambda directory: LiveProvider(),
+    'record': RecordingProvider,
+    'replay': ReplayProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def use_provider(name, directory=None):
+    """Switches this process to a provider by name. Returns it."""
+    global _provider
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown data provider {name!r}, expected one of: {', '.join(PROVIDERS)}")
+    with _provider_lock:
+        _provider = PROVIDERS[name](directory or os.environ.get('DATA_FIXTURES') or DEFAULT_FIXTURES)
+    return _provider
+
+
+def provider():
+    """The process-wide provider, chosen by DATA_PROVIDER on first use."""
+    if _provider is None:
+        use_provider(os.environ.get('DATA_PROVIDER', 'live'))
+    return _provider
@@ -1,46 +1,323 @@
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-import os
-
-def generate_pdf_report(project_title, trend_data, top_supplier, filename):
-    c = canvas.Canvas(filename, pagesize=letter)
-    width, height = letter
-    
+# reportlab is imported inside the functions that draw, so importing this
+# module (which the app does at start) does not load it
+from io import BytesIO
+import hashlib
+import json
+
+from cache import LRUCache
+from parallel import Batch
+
+# Rendered reports, keyed by (keyword, data version)
+REPORT_CACHE_SIZE = 32
+_rendered = LRUCache(REPORT_CACHE_SIZE)
+
+# Chart drawings, keyed by a hash of the series they plot
+CHART_CACHE_SIZE = 64
+_charts = LRUCache(CHART_CACHE_SIZE)
+
+REPORT_SUPPLIERS = 100  # rows in the ranked supplier table
+REPORT_DEADLINE = 10  # seconds to wait for the trend and finance fetches
+
+CHART_WIDTH = 510
+CHART_HEIGHT = 220
+MAX_AXIS_LABELS = 8
+
+MARGIN = 50
+LINE = 16
+
+PAGE_SIZE = (612.0, 792.0)  # US letter, in points
+TREND_COLOR = '#0070f3'
+
+SUPPLIER_COLUMNS = [
+    ('#', 50), ('Supplier', 75), ('Location', 275), ('Rating', 380),
+    ('Quality', 425), ('Ship+Tax', 475), ('Score', 530),
+]
+
+
+def _digest(data):
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def trend_summary(trend_data):
+    """Outlook of a date -> interest series, as drawn in the report."""
+    values = [v for v in (trend_data or {}).values() if v is not None]
+    if not values:
+        return None
+    first, last = values[0], values[-1]
+    change = ((last - first) / first) * 100 if first else 0
+    return {
+        'trend': 'Rising' if last > first else 'Falling' if last < first else 'Stable',
+        'change_percent': round(change, 2),
+        'latest': last,
+        'average': round(sum(values) / len(values), 1),
+        'peak': max(values),
+        'points': len(values),
+    }
+
+
+def line_chart(title, series, color='#000000'):
+    """
+    A vector line chart of a date -> value series. Drawings are cached per
+    series, so repeat reports skip building them.
+    """
+    key = _digest([title, series])
+    drawing = _charts.get(key)
+    if drawing is not None:
+        return drawing
+
+    from reportlab.graphics.charts.linecharts import HorizontalLineChart
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.lib import colors
+
+    dates = list(series)
+    drawing = Drawing(CHART_WIDTH, CHART_HEIGHT)
+    drawing.add(String(0, CHART_HEIGHT - 12, title, fontName='Helvetica-Bold', fontSize=11))
+
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 35, 30
+    chart.width, chart.height = CHART_WIDTH - 45, CHART_HEIGHT - 60
+    chart.data = [[float(v or 0) for v in series.values()]]
+    chart.lines[0].strokeColor = colors.HexColor(color)
+    chart.lines[0].strokeWidth = 1.5
+    step = max(1, len(dates) // MAX_AXIS_LABELS)
+    chart.categoryAxis.categoryNames = [d if i % step == 0 else '' for i, d in enumerate(dates)]
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.valueAxis.labels.fontSize = 7
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.lightgrey
+    drawing.add(chart)
+
+    _charts.set(key, drawing)
+    return drawing
+
+
+def build_charts(trend_data, finance):
+    """
+    Builds the report's charts. They are drawn on the calling thread: the
+    work is CPU-bound, so the fetch pool would add nothing but a queue.
+    """
+    charts = {}
+    if trend_data:
+        charts['trend'] = line_chart('Search interest over time', trend_data, TREND_COLOR)
+    if finance and finance.get('history'):
+        charts['finance'] = line_chart(f"{finance.get('ticker', '')} closing price", finance['history'])
+    return charts
+
+
+class _Pages:
+    """Canvas wrapper that starts a new page when the current one is full."""
+
+    def __init__(self, c, title):
+        self.c = c
+        self.title = title
+        self.width, self.height = PAGE_SIZE
+        self.page = 1
+        self.y = self.height - MARGIN
+
+    def footer(self):
+        self.c.setFont("Helvetica", 8)
+        self.c.drawString(MARGIN, 30, f"Entrepreneur Hub - {self.title}")
+        self.c.drawRightString(self.width - MARGIN, 30, f"Page {self.page}")
+
+    def new_page(self):
+        self.footer()
+        self.c.showPage()
+        self.page += 1
+        self.y = self.height - MARGIN
+
+    def need(self, space):
+        if self.y - space < MARGIN + 20:
+            self.new_page()
+
+    def heading(self, text):
+        self.need(40)
+        self.c.setFont("Helvetica-Bold", 16)
+        self.c.drawString(MARGIN, self.y, text)
+        self.y -= 28
+
+    def line(self, text, font="Helvetica", size=12):
+        self.need(LINE)
+        self.c.setFont(font, size)
+        self.c.drawString(MARGIN, self.y, text)
+        self.y -= LINE + 4
+
+    def drawing(self, drawing):
+        from reportlab.graphics import renderPDF
+        self.need(drawing.height + 10)
+        renderPDF.draw(drawing, self.c, MARGIN, self.y - drawing.height)
+        self.y -= drawing.height + 20
+
+
+def _draw_series_table(pages, series, label):
+    """The full series in four columns of date / value pairs."""
+    items = list(series.items())
+    columns = 4
+    rows = (len(items) + columns - 1) // columns
+    col_width = (pages.width - 2 * MARGIN) / columns
+    pages.need(LINE * 2)
+    pages.c.setFont("Helvetica-Bold", 9)
+    for col in range(columns):
+        pages.c.drawString(MARGIN + col * col_width, pages.y, f"Date / {label}")
+    pages.y -= LINE
+    pages.c.setFont("Helvetica", 9)
+    for row in range(rows):
+        if pages.y < MARGIN + 20:
+            pages.new_page()
+            pages.c.setFont("Helvetica", 9)
+        for col in range(columns):
+            index = col * rows + row
+            if index < len(items):
+                date, value = items[index]
+                pages.c.drawString(MARGIN + col * col_width, pages.y, f"{date}  {value}")
+        pages.y -= 12
+    pages.y -= 10
+
+
+def _draw_supplier_header(pages):
+    pages.c.setFont("Helvetica-Bold", 9)
+    for name, x in SUPPLIER_COLUMNS:
+        pages.c.drawString(x, pages.y, name)
+    pages.y -= 4
+    pages.c.line(MARGIN, pages.y, pages.width - MARGIN, pages.y)
+    pages.y -= 12
+    pages.c.setFont("Helvetica", 9)
+
+
+def _draw_supplier_table(pages, ranked_suppliers):
+    pages.need(LINE * 3)
+    _draw_supplier_header(pages)
+    for rank, entry in enumerate(ranked_suppliers, 1):
+        if pages.y < MARGIN + 20:
+            pages.new_page()
+            _draw_supplier_header(pages)
+        s = entry['supplier']
+        values = [str(rank), (s.name or '')[:38], (s.location or '')[:20], f"{s.rating or 0:.1f}",
+                  s.product_quality or '-', f"${entry['total_cost']:.2f}", f"{entry['score']:.2f}"]
+        for (name, x), value in zip(SUPPLIER_COLUMNS, values):
+            pages.c.drawString(x, pages.y, value)
+        pages.y -= 13
+
+
+def generate_pdf_report(project_title, trend_data, finance, ranked_suppliers, filename):
+    """
+    Draws the report into ``filename``, a path or a writable file object:
+    a summary page, the trend and finance series with their charts, and the
+    ranked supplier table.
+    """
+    from reportlab.pdfgen import canvas
+    c = canvas.Canvas(filename, pagesize=PAGE_SIZE)
+    pages = _Pages(c, project_title)
+    charts = build_charts(trend_data, finance)
+
     # Title
     c.setFont("Helvetica-Bold", 24)
-    c.drawString(50, height - 50, f"Project Report: {project_title}")
-    
-    c.setFont("Helvetica", 12)
-    c.drawString(50, height - 80, "Generated by Entrepreneur Hub")
-    
+    c.drawString(MARGIN, pages.y, f"Project Report: {project_title}")
+    pages.y -= 30
+    pages.line("Generated by Entrepreneur Hub")
+    pages.y -= 20
+
     # Trend Analysis
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, height - 120, "Market Trend Analysis")
-    
-    c.setFont("Helvetica", 12)
-    y = height - 150
-    if trend_data:
-        c.drawString(50, y, f"Trend Outlook: {trend_data.get('trend', 'N/A')}")
-        c.drawString(50, y - 20, f"Recent Change: {trend_data.get('change_percent', 0)}%")
+    pages.heading("Market Trend Analysis")
+    summary = trend_summary(trend_data)
+    if summary:
+        pages.line(f"Trend Outlook: {summary['trend']}")
+        pages.line(f"Change over period: {summary['change_percent']}%")
+        pages.line(f"Latest interest: {summary['latest']}  (average {summary['average']}, peak {summary['peak']})")
     else:
-         c.drawString(50, y, "No trend data available.")
+        pages.line("No trend data available.")
+    pages.y -= 10
+
+    # Market Performance
+    pages.heading("Market Performance")
+    if finance:
+        direction = '+' if finance.get('trend') == 'up' else '-'
+        pages.line(f"Index: {finance.get('ticker', 'N/A')}")
+        pages.line(f"Current price: {finance.get('current_price', 'N/A')}  ({direction}{finance.get('change_percent', 0)}%)")
+    else:
+        pages.line("No market data available.")
+    pages.y -= 10
 
     # Supplier Recommendation
-    c.setFont("Helvetica-Bold", 16)
-    y -= 60
-    c.drawString(50, y, "Top Recommended Supplier")
-    
-    c.setFont("Helvetica", 12)
-    y -= 30
-    if top_supplier:
+    pages.heading("Top Recommended Supplier")
+    if ranked_suppliers:
+        top_supplier = ranked_suppliers[0]
         s = top_supplier['supplier']
-        c.drawString(50, y, f"Name: {s.name}")
-        c.drawString(50, y - 20, f"Location: {s.location}")
-        c.drawString(50, y - 40, f"Rating: {s.rating}/5.0")
-        c.drawString(50, y - 60, f"Est. Total Shipping/Tax: ${top_supplier['total_cost']}")
-        c.drawString(50, y - 80, f"Why? Highest score based on quality vs cost.")
+        pages.line(f"Name: {s.name}")
+        pages.line(f"Location: {s.location}")
+        pages.line(f"Rating: {s.rating}/5.0")
+        pages.line(f"Est. Total Shipping/Tax: ${top_supplier['total_cost']}")
+        pages.line("Why? Highest score based on quality vs cost.")
     else:
-        c.drawString(50, y, "No suppliers found.")
-        
+        pages.line("No suppliers found.")
+
+    # Trend series
+    if trend_data:
+        pages.new_page()
+        pages.heading("Search Interest Over Time")
+        if 'trend' in charts:
+            pages.drawing(charts['trend'])
+        _draw_series_table(pages, trend_data, 'Interest')
+
+    # Finance history
+    if finance and finance.get('history'):
+        pages.new_page()
+        pages.heading("Market Index History")
+        if 'finance' in charts:
+            pages.drawing(charts['finance'])
+        _draw_series_table(pages, finance['history'], 'Close')
+
+    # Ranked suppliers
+    if ranked_suppliers:
+        pages.new_page()
+        pages.heading(f"Supplier Ranking (top {len(ranked_suppliers)})")
+        _draw_supplier_table(pages, ranked_suppliers)
+
+    pages.footer()
     c.save()
     return filename
+
+
+def report_version(trend_data, finance, ranked_suppliers):
+    """Fingerprint of the data a report is drawn from."""
+    suppliers = [[entry['supplier'].id, entry['supplier'].name, entry['supplier'].location,
+                  entry['supplier'].rating, entry['total_cost'], entry['score']]
+                 for entry in ranked_suppliers or []]
+    return _digest([trend_data, finance, suppliers])
+
+
+def render_pdf_report(project_title, trend_data, finance, ranked_suppliers):
+    """
+    Returns the report as PDF bytes, rendered in memory. Repeat requests for
+    the same keyword and data are served from the rendered report cache.
+    """
+    key = (project_title, report_version(trend_data, finance, ranked_suppliers))
+    pdf = _rendered.get(key)
+    if pdf is None:
+        buffer = BytesIO()
+        generate_pdf_report(project_title, trend_data, finance, ranked_suppliers, buffer)
+        pdf = buffer.getvalue()
+        _rendered.set(key, pdf)
+    return pdf
+
+
+def build_keyword_report(keyword, preference=50):
+    """
+    Gathers a keyword's trend series, market history and supplier ranking
+    and returns the rendered report. The two network fetches run in
+    parallel while the suppliers are ranked on the calling thread.
+    """
+    from comparison import top_suppliers
+    from services import get_financial_data, get_market_trends
+
+    batch = Batch({
+        'trends': lambda: get_market_trends(keyword),
+        'finance': lambda: get_financial_data(keyword),
+    })
+    ranked_suppliers = top_suppliers(REPORT_SUPPLIERS, preference)
+    data, missing = batch.collect(REPORT_DEADLINE)
+    for name in missing:
+        print(f"Report for {keyword} rendered without {name}")
+    return render_pdf_report(keyword, data.get('trends'), data.get('finance'), ranked_suppliers)
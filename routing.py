@@ -0,0 +1,61 @@
+"""
+Read/write routing for ``models.db``.
+
+When a ``replica`` bind is configured (see db_config), SELECTs issued
+while handling a request go to the replica and everything else (flushes,
+INSERT/UPDATE/DELETE, raw SQL) goes to the primary. A session that has
+written reads from the primary until its transaction ends, and after a
+committing request the same browser session keeps reading from the
+primary for READ_YOUR_WRITES seconds, so users always see their own
+changes even when the replica lags.
+"""
+import time
+
+from flask import current_app, has_request_context, session as http_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA = 'replica'
+PRIMARY_UNTIL = '_db_primary_until'
+READ_YOUR_WRITES = 5  # seconds; override with the READ_YOUR_WRITES config value
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if clause is None or not getattr(clause, 'is_select', False):
+            return False
+        if self._flushing or self.info.get('wrote'):
+            return False
+        if not has_request_context() or REPLICA not in self._db.engines:
+            return False
+        return time.time() >= http_session.get(PRIMARY_UNTIL, 0)
+
+
+def read_engine(db):
+    """Engine for read-only work done outside the ORM session."""
+    if has_request_context() and time.time() >= http_session.get(PRIMARY_UNTIL, 0):
+        return db.engines.get(REPLICA, db.engine)
+    return db.engine
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _read_your_writes(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        window = current_app.config.get('READ_YOUR_WRITES', READ_YOUR_WRITES)
+        if window:
+            http_session[PRIMARY_UNTIL] = time.time() + window
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop('wrote', None)
@@ -0,0 +1,135 @@
+"""
+Background prefetcher for the market and trend datasets shown on the
+landing page, dashboard and trends page.
+
+Each job re-fetches one dataset through its cached services.py function
+shortly before the cache entry expires, so page handlers only ever read
+precomputed results from the TrendCache store. Schedules are jittered so
+jobs (and several worker processes) do not fire in lockstep, and a job
+whose source keeps failing backs off exponentially.
+
+Run it next to the web app with ``python scheduler.py``, or in-process
+with ``start_prefetcher(app)``.
+"""
+import random
+import threading
+import time
+from functools import partial
+
+from cache import SOURCE_TTLS
+
+PREFETCH_SECTORS = ['all', 'tech', 'fashion', 'food', 'gym']
+# Landing page uses the get_advanced_trends default, /trends its own default
+PREFETCH_TIMEFRAMES = ['today 1-m', '30d']
+
+# Refresh at this fraction of the TTL so entries never go stale
+REFRESH_FRACTION = 0.8
+JITTER = 0.1
+RETRY_BASE = 30  # seconds before the first retry of a failed job
+STATS_RECONCILE_INTERVAL = 3600
+JOB_PURGE_INTERVAL = 3600
+
+
+class Job:
+    def __init__(self, name, func, interval):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.failures = 0
+        self.next_run = 0
+
+    def delay(self):
+        """Seconds until the next run, based on the outcome of the last one."""
+        if self.failures:
+            base = min(RETRY_BASE * 2 ** (self.failures - 1), self.interval * 4)
+        else:
+            base = self.interval
+        return base * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def default_jobs():
+    from services import get_market_marquee_data, get_advanced_trends, get_trending_searches
+    from stats import reconcile
+    from jobs import purge_finished_jobs
+
+    def every(source):
+        return SOURCE_TTLS[source] * REFRESH_FRACTION
+
+    jobs = [
+        Job('marquee', get_market_marquee_data.refresh, every('marquee')),
+        Job('trending_searches', get_trending_searches.refresh, every('trending_searches')),
+    ]
+    for timeframe in PREFETCH_TIMEFRAMES:
+        for sector in PREFETCH_SECTORS:
+            jobs.append(Job(
+                f'advanced_trends:{sector}:{timeframe}',
+                partial(get_advanced_trends.refresh, sector, timeframe),
+                every('advanced_trends')
+            ))
+    # Corrects counter drift from bulk deletes and raw SQL
+    jobs.append(Job('stats_reconcile', reconcile, STATS_RECONCILE_INTERVAL))
+    # Finished report jobs keep their PDFs only for a day
+    jobs.append(Job('report_jobs_purge', purge_finished_jobs, JOB_PURGE_INTERVAL))
+    return jobs
+
+
+class Prefetcher:
+    def __init__(self, app, jobs=None):
+        self.app = app
+        self.jobs = jobs if jobs is not None else default_jobs()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Spread the first runs out instead of firing everything at boot
+        now = time.time()
+        for job in self.jobs:
+            job.next_run = now + random.uniform(0, 5)
+
+    def run_job(self, job):
+        try:
+            with self.app.app_context():
+                live = job.func()
+        except Exception as e:
+            print(f"Prefetch error for {job.name}: {e}")
+            live = False
+
+        job.failures = 0 if live else job.failures + 1
+        job.next_run = time.time() + job.delay()
+        return live
+
+    def run_pending(self):
+        now = time.time()
+        for job in self.jobs:
+            if job.next_run <= now:
+                self.run_job(job)
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            wait = min(job.next_run for job in self.jobs) - time.time()
+            self._stop.wait(max(wait, 1))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='prefetcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def start_prefetcher(app):
+    """Starts the prefetcher on a daemon thread and lets requests rely on it."""
+    app.config['PREFETCH_ENABLED'] = True
+    return Prefetcher(app).start()
+
+
+if __name__ == '__main__':
+    from app import app
+    print("Prefetcher running. Press Ctrl+C to stop.")
+    try:
+        Prefetcher(app).run_forever()
+    except KeyboardInterrupt:
+        pass
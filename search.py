@@ -0,0 +1,166 @@
+"""
+Full-text search over the catalog: product names, categories and supplier
+names, indexed in an SQLite FTS5 table.
+
+The index has one row per product (rowid = product.id) and is kept in
+sync by triggers on the product and supplier tables, so ORM writes, bulk
+deletes and raw SQL all update it. Queries use ranked MATCH lookups with
+prefix matching; the porter tokenizer adds basic English stemming.
+"""
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db, Product, Supplier
+from routing import read_engine
+
+FTS_TABLE = 'catalog_fts'
+MATCH_LIMIT = 200  # suppliers a keyword search returns, best match first
+
+CREATE_INDEX = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    name, category, supplier_name,
+    product_id UNINDEXED, supplier_id UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+"""
+
+_INSERT_NEW = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, category, supplier_name, product_id, supplier_id)
+    VALUES (new.id, new.name, new.category,
+            (SELECT name FROM supplier WHERE id = new.supplier_id), new.id, new.supplier_id);
+"""
+
+CREATE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_product_ai AFTER INSERT ON product BEGIN
+        {_INSERT_NEW}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_product_ad AFTER DELETE ON product BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_product_au AFTER UPDATE ON product BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        {_INSERT_NEW}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_supplier_au AFTER UPDATE OF name ON supplier BEGIN
+        UPDATE {FTS_TABLE} SET supplier_name = new.name WHERE supplier_id = new.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_supplier_ad AFTER DELETE ON supplier BEGIN
+        UPDATE {FTS_TABLE} SET supplier_name = NULL WHERE supplier_id = old.id;
+    END""",
+]
+
+REBUILD_INDEX = f"""
+INSERT INTO {FTS_TABLE} (rowid, name, category, supplier_name, product_id, supplier_id)
+SELECT p.id, p.name, p.category, s.name, p.id, p.supplier_id
+FROM product p LEFT JOIN supplier s ON s.id = p.supplier_id
+"""
+
+
+def _fts_available(conn):
+    return conn.dialect.name == 'sqlite'
+
+
+def init_search_index(conn):
+    """
+    Creates the FTS table and its triggers if missing and fills it from the
+    existing catalog the first time. Safe to call on every start.
+    """
+    if not _fts_available(conn):
+        return False
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': FTS_TABLE}
+    ).first()
+    try:
+        conn.execute(text(CREATE_INDEX))
+    except OperationalError as e:
+        print(f"Full-text search disabled (FTS5 unavailable): {e}")
+        return False
+    for trigger in CREATE_TRIGGERS:
+        conn.execute(text(trigger))
+    if not exists:
+        conn.execute(text(REBUILD_INDEX))
+    return True
+
+
+def rebuild_search_index(conn):
+    """Re-indexes the whole catalog from the product and supplier tables."""
+    conn.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    conn.execute(text(REBUILD_INDEX))
+
+
+def _match_expression(keyword):
+    """Turns free text into an FTS5 query: every word, as a prefix."""
+    words = re.findall(r'\w+', keyword or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_supplier_ids(keyword, limit=None):
+    """
+    Returns the ids of up to ``limit`` suppliers whose products match
+    ``keyword``, best match first (a supplier ranks by its best product).
+    Falls back to a LIKE scan where FTS5 is not available.
+    """
+    query = _match_expression(keyword)
+    if not query:
+        return []
+
+    rows = None
+    # One row per supplier, so a common term does not return every product
+    sql = (f"SELECT supplier_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query "
+           f"GROUP BY supplier_id ORDER BY min(rank) LIMIT :limit")
+    with read_engine(db).connect() as conn:
+        if _fts_available(conn):
+            try:
+                # SQLite reads a negative LIMIT as no limit
+                rows = conn.execute(text(sql), {'query': query, 'limit': limit or -1}).all()
+            except OperationalError as e:
+                print(f"Full-text search failed, using LIKE: {e}")
+    if rows is None:
+        search_term = f"%{keyword}%"
+        rows = db.session.query(Product.supplier_id).filter(
+            Product.name.ilike(search_term) | Product.category.ilike(search_term)
+        ).distinct().limit(limit).all()
+
+    supplier_ids, seen = [], set()
+    for (supplier_id,) in rows:
+        if supplier_id is None or supplier_id in seen:
+            continue
+        seen.add(supplier_id)
+        supplier_ids.append(supplier_id)
+        if limit and len(supplier_ids) >= limit:
+            break
+    return supplier_ids
+
+
+def match_suppliers(keyword, limit=MATCH_LIMIT):
+    """
+    Returns (suppliers, matched) for a keyword: the best ``limit`` suppliers
+    whose products match it, or when none do a sample that is consistent
+    per keyword, with ``matched`` False.
+    """
+    supplier_ids = search_supplier_ids(keyword, limit)
+    if supplier_ids:
+        # Fetch only relevant suppliers
+        return Supplier.query.filter(Supplier.id.in_(supplier_ids)).all(), True
+
+    # Fallback: Smart Logic based on Keyword
+    # Instead of showing the same top 3, pick a random set based on the keyword hash
+    # This ensures 'Gym' gets different (but consistent) suppliers than 'Fashion'
+    # Only the ids are loaded to pick the sample; the rows come after
+    all_supplier_ids = [row.id for row in db.session.query(Supplier.id).order_by(Supplier.id)]
+    if not all_supplier_ids:
+        return [], False
+
+    import random
+    # Use keyword to seed the selection so it's consistent for this analysis but unique per keyword
+    seed_val = sum(ord(c) for c in keyword)
+    rng = random.Random(seed_val)
+
+    # Select 3 to 5 random suppliers
+    sample_size = min(len(all_supplier_ids), rng.randint(3, 5))
+    sample_ids = rng.sample(all_supplier_ids, sample_size)
+    by_id = {s.id: s for s in Supplier.query.filter(Supplier.id.in_(sample_ids))}
+    return [by_id[i] for i in sample_ids], False
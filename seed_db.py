@@ -1,6 +1,7 @@
 from app import app
-from models import db, User, Supplier, Product, Project
+from models import db, User, Supplier, SupplierScore, Product, Project
 from werkzeug.security import generate_password_hash
+from stats import reconcile
 
 def seed_database():
     with app.app_context():
@@ -8,6 +9,7 @@ def seed_database():
         print("Cleaning old data...")
         Project.query.delete()
         Product.query.delete()
+        SupplierScore.query.delete()
         Supplier.query.delete()
         User.query.delete()
         
@@ -105,6 +107,9 @@ def seed_database():
         db.session.add_all(products)
         db.session.commit()
         print(f"-> Added {len(products)} products.")
+
+        # The bulk deletes above bypass the counter events
+        reconcile()
         print("Database initialized successfully.")
 
 if __name__ == '__main__':
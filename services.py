@@ -1,13 +1,9 @@
-import yfinance as yf
-from pytrends.request import TrendReq
-import pandas as pd
 import os
-import requests
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from datetime import datetime, timedelta
-
-# Global SSL Fix for environments with path encoding issues
-requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+from cache import cached, mark_degraded
+from matcher import load_matcher
+from parallel import gather
+from providers import provider
 
 # Only apply the local cert fix if on Windows and the specific path exists
 if os.name == 'nt':
@@ -16,17 +12,15 @@ if os.name == 'nt':
         os.environ['SSL_CERT_FILE'] = cert_path
         os.environ['REQUESTS_CA_BUNDLE'] = cert_path
 
+
+@cached('trends')
 def get_market_trends(keyword):
     """
     Fetches interest over time from Google Trends.
     Returns a dictionary of dates and interest values.
     """
     try:
-        pytrends = TrendReq(hl='en-US', tz=360)
-        kw_list = [keyword]
-        pytrends.build_payload(kw_list, cat=0, timeframe='today 12-m', geo='', gprop='')
-        
-        interest_over_time_df = pytrends.interest_over_time()
+        interest_over_time_df = provider().interest_over_time([keyword], 'today 12-m')
         if interest_over_time_df.empty:
             raise Exception("Empty Trends Data")
             
@@ -36,96 +30,98 @@ def get_market_trends(keyword):
         return {str(k.date()): v for k, v in data.items()}
     except Exception as e:
         print(f"Error fetching trends: {e}")
-        # Standard Fallback for Data Visualization
-        import random
-        from datetime import datetime, timedelta
-        fallback = {}
-        curr = datetime.now()
-        for i in range(12, 0, -1):
-            date_str = (curr - timedelta(days=i*30)).strftime('%Y-%m-%d')
-            fallback[date_str] = random.randint(40, 95)
-        return fallback
+        return _trends_fallback()
+
+def _trends_fallback():
+    mark_degraded()
+    # Standard Fallback for Data Visualization
+    import random
+    fallback = {}
+    curr = datetime.now()
+    for i in range(12, 0, -1):
+        date_str = (curr - timedelta(days=i*30)).strftime('%Y-%m-%d')
+        fallback[date_str] = random.randint(40, 95)
+    return fallback
+
+# Keywords mapped to relevant ETFs/Indices, in data/ticker_keywords.json
+TICKER_KEYWORDS = load_matcher('ticker_keywords.json')
+
+def _resolve_ticker(keyword):
+    """The ETF/index tracking a keyword's sector (longest matching key wins)."""
+    return TICKER_KEYWORDS.match(keyword)
+
+@cached('finance')
+def get_ticker_data(ticker_symbol):
+    """Last month of closing prices for a ticker. Raises when unavailable."""
+    history = provider().ticker_history(ticker_symbol, period="1mo", interval="1d")
+    if history.empty:
+        raise Exception("No data")
+        
+    series = {str(k.date()): round(v, 2) for k, v in history['Close'].to_dict().items()}
+    
+    start_price = history['Close'].iloc[0]
+    end_price = history['Close'].iloc[-1]
+    change = ((end_price - start_price) / start_price) * 100
+    
+    return {
+        'current_price': round(end_price, 2),
+        'trend': 'up' if change > 0 else 'down',
+        'change_percent': round(abs(change), 2),
+        'history': series,
+        'ticker': ticker_symbol
+    }
 
+@cached('finance')
 def get_financial_data(keyword='global'):
     """
     Fetches financial data relevant to the specific keyword/sector.
     Maps keywords to relevant tickers or uses deterministic logic.
     """
-
-    # Map keywords to relevant ETFs/Indices
-    keyword_map = {
-        'tech': 'XLK', 'ai': 'BOTZ', 'software': 'IGV',
-        'fashion': 'XLY', 'retail': 'XRT', 'clothing': 'VCR',
-        'food': 'XLP', 'beverage': 'PBJ', 'restaurant': 'EAT',
-        'gym': 'BFIT', 'fitness': 'XLY', 'health': 'XLV',
-        'energy': 'XLE', 'solar': 'TAN', 'oil': 'USO',
-        'finance': 'XLF', 'crypto': 'BITO'
-    }
-    
-    # Try to find a partial match
-    ticker_symbol = 'EURUSD=X' # Default global trade
-    for key, sym in keyword_map.items():
-        if key in keyword.lower():
-            ticker_symbol = sym
-            break
-
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        history = ticker.history(period="1mo", interval="1d")
-        if history.empty:
-            raise Exception("No data")
-            
-        series = {str(k.date()): round(v, 2) for k, v in history['Close'].to_dict().items()}
-        
-        start_price = history['Close'].iloc[0]
-        end_price = history['Close'].iloc[-1]
-        change = ((end_price - start_price) / start_price) * 100
-        
-        return {
-            'current_price': round(end_price, 2),
-            'trend': 'up' if change > 0 else 'down',
-            'change_percent': round(abs(change), 2),
-            'history': series,
-            'ticker': ticker_symbol
-        }
+        return get_ticker_data(_resolve_ticker(keyword))
     except Exception as e:
-        # Integrated fallback for reliability
-        import random
-        seed_val = sum(ord(c) for c in keyword)
-        random.seed(seed_val)
-        base_price = random.randint(120, 240) + random.random()
+        return _finance_fallback(keyword)
+
+def _finance_fallback(keyword):
+    # Integrated fallback for reliability
+    mark_degraded()
+    import random
+    seed_val = sum(ord(c) for c in keyword)
+    rng = random.Random(seed_val)
+    base_price = rng.randint(120, 240) + rng.random()
+    
+    # Generate realistic historical data with noise
+    history = {}
+    curr = datetime.now()
+    temp_price = base_price
+    for i in range(30, -1, -1):
+        date_str = str((curr - timedelta(days=i)).date())
+        temp_price += (rng.random() - 0.48) * 1.5
+        history[date_str] = round(temp_price, 2)
         
-        # Generate realistic historical data with noise
-        history = {}
-        curr = datetime.now()
-        temp_price = base_price
-        for i in range(30, -1, -1):
-            date_str = str((curr - timedelta(days=i)).date())
-            temp_price += (random.random() - 0.48) * 1.5
-            history[date_str] = round(temp_price, 2)
-            
-        return {
-            'current_price': round(temp_price, 2),
-            'trend': 'up' if temp_price > base_price else 'down',
-            'change_percent': round(abs(((temp_price - base_price)/base_price)*100), 2),
-            'history': history,
-            'ticker': f'IDX:{keyword.upper()[:3]}'
-        }
+    return {
+        'current_price': round(temp_price, 2),
+        'trend': 'up' if temp_price > base_price else 'down',
+        'change_percent': round(abs(((temp_price - base_price)/base_price)*100), 2),
+        'history': history,
+        'ticker': f'IDX:{keyword.upper()[:3]}'
+    }
 
 
+@cached('trending_searches')
 def get_trending_searches():
     """
     Fetches REAL real-time trending searches from Google Trends.
     """
     try:
-        pytrends = TrendReq(hl='en-US', tz=360)
         # Fetch trending searches for United States (most relevant for global trends)
-        df = pytrends.trending_searches(pn='united_states')
-        return df[0].head(5).tolist()
+        return provider().trending_searches('united_states')[:5]
     except Exception as e:
         print(f"Error fetching live trends: {e}")
+        mark_degraded()
         return ['Smart Automation', 'Energy Tech', 'Global Sourcing', 'E-commerce', 'Sustainability']
 
+@cached('advanced_trends')
 def get_advanced_trends(category='all', timeframe='today 1-m'):
     """
     Fetches market insight data for specific sectors.
@@ -157,8 +153,6 @@ def get_advanced_trends(category='all', timeframe='today 1-m'):
     }
 
     try:
-        pytrends = TrendReq(hl='en-US', tz=360)
-        
         if category == 'all':
             # Create a "Market Macro" view that is distinct from individual sectors
             kws = ['Global Trade AI', 'Supply Chain Tokenization', 'Borderless Logistics', 'Green Energy 2026', 'Automation Economy']
@@ -168,8 +162,7 @@ def get_advanced_trends(category='all', timeframe='today 1-m'):
         else:
             kws = sector_kws.get(category, ['Global Enterprise', 'Market Nexus', 'Logic Layer'])
 
-        pytrends.build_payload(kws, timeframe=timeframe)
-        df = pytrends.interest_over_time()
+        df = provider().interest_over_time(kws, timeframe)
         
         if df.empty:
             raise Exception("Empty Trends Data")
@@ -202,6 +195,7 @@ def get_advanced_trends(category='all', timeframe='today 1-m'):
 
     except Exception as e:
         print(f"Error fetching advanced trends: {e}")
+        mark_degraded()
         # Statistical data generation for high-fidelity visualization
         import random
         results = []
@@ -235,9 +229,9 @@ def get_advanced_trends(category='all', timeframe='today 1-m'):
             items = []
             for word in sim_words:
                 seed = sum(ord(c) for c in (category + word))
-                random.seed(seed)
-                val = random.randint(-10, 140)
-                vol = random.randint(10, 150) * 1000
+                rng = random.Random(seed)
+                val = rng.randint(-10, 140)
+                vol = rng.randint(10, 150) * 1000
                 st = 'High Growth' if val > 40 else 'Rising' if val > 0 else 'Standard' if val > -10 else 'Dynamic'
                 items.append((word, vol, val, st))
         
@@ -253,6 +247,36 @@ def get_advanced_trends(category='all', timeframe='today 1-m'):
         results.sort(key=lambda x: x['growth'], reverse=True)
         for idx, item in enumerate(results): item['rank'] = idx + 1
         return results
+# Shown on the landing page when a sector has no data
+SECTOR_DEFAULTS = {
+    'tech': {'keyword': 'Automation', 'volume': '12M', 'growth': 85},
+    'fashion': {'keyword': 'Style', 'volume': '5M', 'growth': 22},
+    'food': {'keyword': 'Organic', 'volume': '3M', 'growth': 14},
+    'gym': {'keyword': 'Fitness', 'volume': '8M', 'growth': 45},
+}
+SECTOR_DEADLINE = 8
+
+def get_sector_summaries(sectors=None, timeframe='today 1-m'):
+    """
+    Returns the top trend item for each sector in one pass.
+    Sectors are fetched in parallel (one get_advanced_trends call each);
+    sectors that fail or miss SECTOR_DEADLINE get their SECTOR_DEFAULTS entry.
+    """
+    sectors = sectors or list(SECTOR_DEFAULTS)
+    fetched, missing = gather(
+        {sector: (lambda sector=sector: get_advanced_trends(sector, timeframe)) for sector in sectors},
+        deadline=SECTOR_DEADLINE
+    )
+    if missing:
+        print(f"Sector trends missing for: {', '.join(missing)}")
+
+    summaries = {}
+    for sector in sectors:
+        items = fetched.get(sector)
+        summaries[sector] = items[0] if items else SECTOR_DEFAULTS.get(sector)
+    return summaries
+
+@cached('buzz')
 def get_social_buzz(keyword):
     """
     Calculates a Search-based Buzz Score using real pytrends data.
@@ -260,66 +284,111 @@ def get_social_buzz(keyword):
     """
 
     try:
-        pytrends = TrendReq(hl='en-US', tz=360)
-        pytrends.build_payload([keyword], timeframe='now 7-d')
-        df = pytrends.interest_over_time()
-        
-        if df.empty:
-            # High-precision statistical fallback
-            random.seed(sum(ord(c) for c in keyword))
-            score = random.randint(65, 98)
-        else:
-            avg = df[keyword].mean()
-            peak = df[keyword].max()
-            score = int((peak / (avg if avg > 0 else 1)) * 60)
-            score = min(max(score, 60), 99)
-
-        # Dynamic Trending Products based on Keyword
-        prefixes = ['Smart', 'Eco', 'Digital', 'Pro', 'Future', 'Sustainable']
-        suffixes = ['Systems', 'Design', 'Solutions', 'Tech', 'Hub', 'Network']
-        
-        random.seed(sum(ord(c) for c in keyword) + 5) # Different seed
-        products = []
-        for _ in range(3):
-            p = f"{random.choice(prefixes)} {keyword.title()} {random.choice(suffixes)}"
-            products.append({
-                'name': p,
-                'growth': random.randint(12, 85)
-            })
+        df = provider().interest_over_time([keyword], 'now 7-d')
+        return _buzz_from_interest(keyword, None if df.empty else df[keyword])
+    except Exception:
+        return _buzz_fallback(keyword)
 
-        return {
-            'buzz_score': score,
-            'platforms': ['TikTok', 'Instagram', 'Search'],
-            'trending_products': products,
-            'sentiment_label': 'High Demand' if score > 80 else 'Rising Interest'
-        }
-    except:
-        # Integrated dataset for stability
-        import random
-        random.seed(sum(ord(c) for c in keyword))
-        score = random.randint(65, 98)
-        
-        # Dynamic Trending Products based on Keyword
-        prefixes = ['Smart', 'Eco', 'Digital', 'Pro', 'Future', 'Sustainable']
-        suffixes = ['Systems', 'Design', 'Solutions', 'Tech', 'Hub', 'Network']
-        
-        products = []
-        for _ in range(3):
-            p = f"{random.choice(prefixes)} {keyword.title()} {random.choice(suffixes)}"
-            products.append({
-                'name': p,
-                'growth': random.randint(12, 85)
-            })
+def _buzz_from_interest(keyword, interest):
+    """Buzz for a keyword's last-week interest series (None when Google had none)."""
+    import random
+    if interest is None:
+        # High-precision statistical fallback
+        score = random.Random(sum(ord(c) for c in keyword)).randint(65, 98)
+    else:
+        avg = interest.mean()
+        peak = interest.max()
+        score = int((peak / (avg if avg > 0 else 1)) * 60)
+        score = min(max(score, 60), 99)
 
-        return {
-            'buzz_score': score, 
-            'platforms': ['Global Networks'], 
-            'trending_products': products, 
-            'sentiment_label': 'Stable'
-        }
+    # Dynamic Trending Products based on Keyword
+    prefixes = ['Smart', 'Eco', 'Digital', 'Pro', 'Future', 'Sustainable']
+    suffixes = ['Systems', 'Design', 'Solutions', 'Tech', 'Hub', 'Network']
+    
+    rng = random.Random(sum(ord(c) for c in keyword) + 5) # Different seed
+    products = []
+    for _ in range(3):
+        p = f"{rng.choice(prefixes)} {keyword.title()} {rng.choice(suffixes)}"
+        products.append({
+            'name': p,
+            'growth': rng.randint(12, 85)
+        })
+
+    return {
+        'buzz_score': score,
+        'platforms': ['TikTok', 'Instagram', 'Search'],
+        'trending_products': products,
+        'sentiment_label': 'High Demand' if score > 80 else 'Rising Interest'
+    }
+
+def _buzz_fallback(keyword):
+    # Integrated dataset for stability
+    mark_degraded()
+    import random
+    rng = random.Random(sum(ord(c) for c in keyword))
+    score = rng.randint(65, 98)
+    
+    # Dynamic Trending Products based on Keyword
+    prefixes = ['Smart', 'Eco', 'Digital', 'Pro', 'Future', 'Sustainable']
+    suffixes = ['Systems', 'Design', 'Solutions', 'Tech', 'Hub', 'Network']
+    
+    products = []
+    for _ in range(3):
+        p = f"{rng.choice(prefixes)} {keyword.title()} {rng.choice(suffixes)}"
+        products.append({
+            'name': p,
+            'growth': rng.randint(12, 85)
+        })
+
+    return {
+        'buzz_score': score, 
+        'platforms': ['Global Networks'], 
+        'trending_products': products, 
+        'sentiment_label': 'Stable'
+    }
+
+# Per-symbol request timeout and overall wait for the marquee fan-out
+MARQUEE_SYMBOL_TIMEOUT = 4
+MARQUEE_DEADLINE = 6
+
+def _fetch_marquee_quote(label, sym):
+    """Fetches one marquee symbol. Returns None when no data is available."""
+    data = provider().ticker_history(sym, period="5d", timeout=MARQUEE_SYMBOL_TIMEOUT) # 5 days to guarantee data on weekends
 
+    if data.empty:
+        return None
+
+    # Use the last 2 available trading sessions
+    if len(data) >= 2:
+        current = data['Close'].iloc[-1]
+        prev = data['Close'].iloc[-2]
+    else:
+        current = data['Close'].iloc[-1]
+        prev = current # No change if only 1 day available
+
+    change = 0
+    if prev != 0:
+        change = ((current - prev) / prev) * 100
+
+    change_label = f"{change:+.2f}%"
+    if abs(change) < 0.0001:
+        change_label = "STABLE"
+
+    return {
+        'label': label,
+        'price': f"{current:,.2f}",
+        'change': change_label,
+        'up': bool(change > 0),
+        'neutral': bool(abs(change) < 0.0001)
+    }
+
+@cached('marquee')
 def get_market_marquee_data():
-    """Fetches real market indicators for the dashboard ticker."""
+    """
+    Fetches real market indicators for the dashboard ticker.
+    All symbols are requested concurrently; whatever has arrived by
+    MARQUEE_DEADLINE is returned in the usual symbol order.
+    """
 
     symbols = {
         '🥇 GOLD': 'GC=F',
@@ -330,38 +399,98 @@ def get_market_marquee_data():
         '₿ BITCOIN': 'BTC-USD',
         '🏗️ IRON ORE': 'TIO=F'
     }
-    results = []
-    
-    for label, sym in symbols.items():
+
+    quotes, missing = gather(
+        {sym: (lambda label=label, sym=sym: _fetch_marquee_quote(label, sym)) for label, sym in symbols.items()},
+        deadline=MARQUEE_DEADLINE
+    )
+    missing += [sym for sym, quote in quotes.items() if quote is None]
+    results = [quotes[sym] for sym in symbols.values() if quotes.get(sym)]
+
+    if missing:
+        print(f"Ticker data missing for: {', '.join(missing)}")
+        mark_degraded()
+    return results
+
+
+# Batch fetches for many keywords at once (see batch.py)
+TRENDS_PAYLOAD_LIMIT = 5 # keywords Google Trends compares in one request
+
+def _interest_groups(keywords, timeframe):
+    """Yields (group, interest DataFrame or None) for up to five keywords at a time."""
+    for i in range(0, len(keywords), TRENDS_PAYLOAD_LIMIT):
+        group = keywords[i:i + TRENDS_PAYLOAD_LIMIT]
         try:
-            ticker = yf.Ticker(sym)
-            data = ticker.history(period="5d") # 5 days to guarantee data on weekends
-            
-            if not data.empty:
-                # Use the last 2 available trading sessions
-                if len(data) >= 2:
-                    current = data['Close'].iloc[-1]
-                    prev = data['Close'].iloc[-2]
-                else:
-                    current = data['Close'].iloc[-1]
-                    prev = current # No change if only 1 day available
-                
-                change = 0
-                if prev != 0:
-                    change = ((current - prev) / prev) * 100
-                
-                change_label = f"{change:+.2f}%"
-                if abs(change) < 0.0001:
-                    change_label = "STABLE"
-                
-                results.append({
-                    'label': label,
-                    'price': f"{current:,.2f}",
-                    'change': change_label,
-                    'up': bool(change > 0),
-                    'neutral': bool(abs(change) < 0.0001)
-                })
+            df = provider().interest_over_time(group, timeframe)
         except Exception as e:
-            print(f"Ticker Error for {sym}: {e}")
-            continue
+            print(f"Error fetching trends for {', '.join(group)}: {e}")
+            df = None
+        yield group, df
+
+def _uncached(fetcher, keywords):
+    results, missing = {}, []
+    for keyword in keywords:
+        hit, value = fetcher.peek(keyword)
+        if hit:
+            results[keyword] = value
+        else:
+            missing.append(keyword)
+    return results, missing
+
+def get_market_trends_batch(keywords):
+    """
+    get_market_trends for many keywords, five per Google Trends request.
+    Google scales every series of a request to the request's overall peak,
+    so each one is rescaled to its own peak of 100 as a single-keyword
+    request would be (a quiet keyword grouped with popular ones loses some
+    resolution). Cached keywords are not fetched again.
+    """
+    results, missing = _uncached(get_market_trends, keywords)
+    for group, df in _interest_groups(missing, 'today 12-m'):
+        for keyword in group:
+            if df is None or df.empty or keyword not in df:
+                results[keyword] = _trends_fallback()
+                get_market_trends.store(results[keyword], keyword, live=False)
+                continue
+            series = df[keyword]
+            peak = series.max()
+            scale = 100.0 / peak if peak > 0 else 1
+            results[keyword] = {str(k.date()): int(round(v * scale)) for k, v in series.items()}
+            get_market_trends.store(results[keyword], keyword)
+    return results
+
+def get_social_buzz_batch(keywords):
+    """get_social_buzz for many keywords, five per Google Trends request."""
+    results, missing = _uncached(get_social_buzz, keywords)
+    for group, df in _interest_groups(missing, 'now 7-d'):
+        for keyword in group:
+            if df is None:
+                results[keyword] = _buzz_fallback(keyword)
+                get_social_buzz.store(results[keyword], keyword, live=False)
+            else:
+                # Peak over average does not depend on how the group is scaled
+                interest = None if df.empty or keyword not in df else df[keyword]
+                results[keyword] = _buzz_from_interest(keyword, interest)
+                get_social_buzz.store(results[keyword], keyword)
     return results
+
+def get_financial_data_batch(keywords, tickers=None):
+    """
+    get_financial_data for many keywords, fetching each ticker once.
+    ``tickers`` (ticker -> data, or None once a fetch failed) can be shared
+    between calls so a long batch never fetches the same ETF twice.
+
+    Tickers are fetched one after another on the calling thread: this runs
+    as a task on the shared fetch pool already, and tasks queued behind it
+    on that pool could wait out any deadline. A batch only touches a
+    handful of ETFs, and yahoo_limiter spaces the requests anyway.
+    """
+    tickers = {} if tickers is None else tickers
+    by_keyword = {keyword: _resolve_ticker(keyword) for keyword in keywords}
+    for sym in sorted(set(by_keyword.values()) - set(tickers)):
+        try:
+            tickers[sym] = get_ticker_data(sym)
+        except Exception as e:
+            print(f"Error fetching {sym}: {e}")
+            tickers[sym] = None
+    return {keyword: tickers[sym] or _finance_fallback(keyword) for keyword, sym in by_keyword.items()}
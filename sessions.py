@@ -0,0 +1,171 @@
+"""
+Shared HTTP plumbing for the live pytrends and yfinance calls (providers.py).
+
+- One keep-alive ``requests.Session`` with a connection pool serves every
+  Google Trends request, instead of pytrends opening a fresh session (and
+  TCP/TLS connection) per call.
+- The Google ``NID`` cookie is fetched once and cached for COOKIE_TTL, so
+  creating a pytrends client no longer costs a handshake round-trip.
+- Client-side token-bucket rate limiters keep bursts of concurrent
+  requests under the upstream throttling thresholds; a 429 from Google
+  pauses all Google traffic for a cool-down period.
+
+yfinance already keeps a single process-wide session (its ``YfData``
+singleton), so for Yahoo only the rate limiter is applied.
+
+requests, pytrends and yfinance (which bring in pandas) are imported on
+first use, so importing this module stays cheap.
+"""
+import json
+import threading
+import time
+
+POOL_SIZE = 16
+COOKIE_TTL = 3600
+GOOGLE_COOLDOWN = 60  # seconds to pause Google traffic after a 429
+
+
+class RateLimiter:
+    """Thread-safe token bucket: ``rate`` requests per second, bursts up to ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Blocks all callers for ``seconds``, e.g. after being throttled upstream."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._updated = self._paused_until
+            self._tokens = 0
+
+
+google_limiter = RateLimiter(rate=1.0, burst=5)
+yahoo_limiter = RateLimiter(rate=4.0, burst=8)
+
+_session = None
+_session_lock = threading.Lock()
+_cookies = None
+_cookies_at = 0
+_cookie_lock = threading.Lock()
+_local = threading.local()
+
+
+def http_session():
+    """Returns the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from requests.packages.urllib3.exceptions import InsecureRequestWarning
+
+            # Global SSL Fix for environments with path encoding issues
+            requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def google_cookies(hl='en-US', timeout=(2, 5)):
+    """Returns the cached Google ``NID`` cookie, refreshing it after COOKIE_TTL."""
+    global _cookies, _cookies_at
+    from pytrends.request import BASE_TRENDS_URL
+    with _cookie_lock:
+        if _cookies is None or time.time() - _cookies_at > COOKIE_TTL:
+            google_limiter.acquire()
+            response = http_session().get(f'{BASE_TRENDS_URL}/explore/?geo={hl[-2:]}', timeout=timeout)
+            _cookies = dict(filter(lambda i: i[0] == 'NID', response.cookies.items()))
+            _cookies_at = time.time()
+        return dict(_cookies)
+
+
+def reset_google_cookies():
+    global _cookies
+    with _cookie_lock:
+        _cookies = None
+
+
+_trend_req_class = None
+
+
+def pooled_trend_req():
+    """The PooledTrendReq class, defined on first use so pytrends loads lazily."""
+    global _trend_req_class
+    if _trend_req_class is not None:
+        return _trend_req_class
+
+    from pytrends import exceptions
+    from pytrends.request import TrendReq
+
+    class PooledTrendReq(TrendReq):
+        """
+        TrendReq that goes through the shared session, cookie cache and Google
+        rate limiter. Instances hold per-query payload state, so use one per
+        thread (see ``trend_client``).
+        """
+
+        def GetGoogleCookie(self):
+            return google_cookies(self.hl, self.timeout)
+
+        def _get_data(self, url, method=TrendReq.GET_METHOD, trim_chars=0, **kwargs):
+            # Pick up a refreshed cookie even on a long-lived client
+            self.cookies = google_cookies(self.hl, self.timeout)
+            google_limiter.acquire()
+            session = http_session()
+            send = session.post if method == TrendReq.POST_METHOD else session.get
+            response = send(url, timeout=self.timeout, cookies=self.cookies,
+                            headers=self.headers, **kwargs, **self.requests_args)
+
+            content_type = response.headers.get('Content-Type', '')
+            if response.status_code == 200 and any(t in content_type for t in ('application/json', 'application/javascript', 'text/javascript')):
+                return json.loads(response.text[trim_chars:])
+
+            if response.status_code == 429:
+                google_limiter.pause(GOOGLE_COOLDOWN)
+                raise exceptions.TooManyRequestsError.from_response(response)
+            if response.status_code in (401, 403):
+                # Most likely an expired cookie; fetch a new one next time
+                reset_google_cookies()
+            raise exceptions.ResponseError.from_response(response)
+
+    _trend_req_class = PooledTrendReq
+    return _trend_req_class
+
+
+def trend_client():
+    """Returns this thread's pytrends client (cheap to create, cookies are shared)."""
+    client = getattr(_local, 'pytrends', None)
+    if client is None:
+        client = _local.pytrends = pooled_trend_req()(hl='en-US', tz=360)
+    return client
+
+
+def ticker_history(symbol, **kwargs):
+    """``yf.Ticker(symbol).history(**kwargs)`` behind the Yahoo rate limiter."""
+    import yfinance as yf
+    yahoo_limiter.acquire()
+    return yf.Ticker(symbol).history(**kwargs)
@@ -0,0 +1,83 @@
+"""
+Platform counters (users, suppliers, projects) for the landing page,
+dashboard and trends page.
+
+Counts live in the PlatformStat table and are kept current by mapper
+events that add or subtract one in the same transaction as each ORM
+insert or delete, so reading them never runs COUNT(*). Bulk deletes and
+raw SQL bypass the events; ``reconcile`` recounts the tables and is run
+periodically by the prefetcher (and after seeding) to correct any drift.
+"""
+import threading
+import time
+
+from sqlalchemy import event, func, select
+
+from models import db, PlatformStat, Project, Supplier, User
+
+COUNTED = {
+    'users': User,
+    'suppliers': Supplier,
+    'projects': Project,
+}
+READ_TTL = 5  # seconds the counters are reused within a process
+
+_counts = None
+_counts_at = 0
+_lock = threading.Lock()
+
+
+def reconcile(connection=None):
+    """Recounts every counted table and stores the exact values."""
+    global _counts
+    if connection is None:
+        with db.engine.begin() as conn:
+            return reconcile(conn)
+
+    table = PlatformStat.__table__
+    for name, model in COUNTED.items():
+        value = connection.execute(select(func.count()).select_from(model.__table__)).scalar()
+        updated = connection.execute(
+            table.update().where(table.c.name == name).values(value=value)
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(name=name, value=value))
+    with _lock:
+        _counts = None
+    return True
+
+
+def get_platform_counts():
+    """Returns {'users': n, 'suppliers': n, 'projects': n} from the counter table."""
+    global _counts, _counts_at
+    with _lock:
+        if _counts is not None and time.time() - _counts_at < READ_TTL:
+            return dict(_counts)
+
+    table = PlatformStat.__table__
+    with db.engine.connect() as conn:
+        counts = dict(conn.execute(select(table.c.name, table.c.value)).all())
+    if not set(COUNTED) <= set(counts):
+        reconcile()
+        return get_platform_counts()
+
+    with _lock:
+        _counts, _counts_at = counts, time.time()
+    return dict(counts)
+
+
+def _adjust(name, delta):
+    def listener(mapper, connection, target):
+        global _counts
+        table = PlatformStat.__table__
+        connection.execute(
+            table.update().where(table.c.name == name).values(value=table.c.value + delta)
+        )
+        with _lock:
+            _counts = None
+    return listener
+
+
+for _name, _model in COUNTED.items():
+    event.listen(_model, 'after_insert', _adjust(_name, 1))
+    event.listen(_model, 'after_delete', _adjust(_name, -1))
@@ -0,0 +1,63 @@
+"""
+Supplier nodes for the /trends map, served a page at a time.
+
+Suppliers only carry a free-text location ("Global (China)"), so each one
+is placed at the centre of the first known country its location names.
+Pages use keyset pagination on the supplier id, and a map viewport is
+turned into a filter on the countries inside it, so the cost of a page
+does not grow with the size of the supplier table.
+"""
+from sqlalchemy import or_
+
+from models import Supplier
+
+COUNTRY_COORDS = {
+    'Jordan': [31.9454, 35.9284],
+    'China': [35.8617, 104.1954],
+    'USA': [37.0902, -95.7129],
+    'Italy': [41.8719, 12.5674],
+    'Turkey': [38.9637, 35.2433],
+    'Vietnam': [14.0583, 108.2772],
+    'France': [46.2276, 2.2137],
+}
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+
+def locate(location):
+    """Map coordinates for a supplier location, or None when unknown."""
+    for country, coords in COUNTRY_COORDS.items():
+        if country in (location or ''):
+            return coords
+    return None
+
+
+def countries_in(bbox):
+    """Known countries whose centre lies in (south, west, north, east)."""
+    south, west, north, east = bbox
+    return [country for country, (lat, lng) in COUNTRY_COORDS.items()
+            if south <= lat <= north and west <= lng <= east]
+
+
+def supplier_page(after_id=0, per_page=DEFAULT_PAGE_SIZE, bbox=None):
+    """
+    Returns (nodes, next_cursor): up to ``per_page`` located suppliers with
+    an id above ``after_id``, optionally limited to a viewport, and the
+    cursor for the next page (None on the last one).
+    """
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    query = Supplier.query.with_entities(Supplier.id, Supplier.name, Supplier.location)
+
+    countries = countries_in(bbox) if bbox else list(COUNTRY_COORDS)
+    if not countries:
+        return [], None
+    query = query.filter(or_(*[Supplier.location.contains(country) for country in countries]))
+
+    rows = query.filter(Supplier.id > after_id).order_by(Supplier.id).limit(per_page + 1).all()
+    nodes = []
+    for row in rows[:per_page]:
+        coords = locate(row.location)
+        nodes.append({'id': row.id, 'name': row.name, 'location': row.location,
+                      'lat': coords[0], 'lng': coords[1]})
+    next_cursor = rows[per_page - 1].id if len(rows) > per_page else None
+    return nodes, next_cursor
@@ -0,0 +1,120 @@
+"""
+Startup work done once instead of on the first requests of every worker.
+
+- Templates compile through a FileSystemBytecodeCache in the instance
+  folder, so a compiled template is shared by every worker and restart.
+- ``ensure_schema`` runs create_all and the migrations only when the
+  models, the migrations or the database changed since the last run; the
+  result is recorded in a marker file per schema version.
+- ``warm_up`` precompiles every template and imports the heavy libraries
+  (pandas, yfinance, pytrends, reportlab). gunicorn.conf.py runs it in the
+  master process before forking, so workers start with both in memory.
+
+``python warmup.py`` does the same ahead of time, e.g. during a deploy.
+"""
+import glob
+import hashlib
+import importlib
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+from models import db
+
+TEMPLATE_CACHE_DIR = 'jinja_cache'  # inside the app's instance folder
+SCHEMA_MARKER = '.schema-{}'
+
+HEAVY_MODULES = [
+    'numpy',
+    'pandas',
+    'yfinance',
+    'pytrends.request',
+    'reportlab.pdfgen.canvas',
+    'reportlab.graphics.renderPDF',
+    'reportlab.graphics.charts.linecharts',
+]
+
+
+def configure_template_cache(app):
+    """Stores compiled templates on disk, shared between worker processes."""
+    directory = os.path.join(app.instance_path, TEMPLATE_CACHE_DIR)
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile_templates(app):
+    """Compiles every template into the bytecode cache and the environment."""
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def preimport(modules=HEAVY_MODULES):
+    loaded = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError as e:
+            print(f"Warm-up import of {name} failed: {e}")
+    return loaded
+
+
+def schema_fingerprint(app):
+    """Identifies the schema the code expects on a given database."""
+    from migrations import MIGRATIONS
+
+    parts = [app.config['SQLALCHEMY_DATABASE_URI']]
+    for table in db.metadata.sorted_tables:
+        parts.append(table.name)
+        parts.extend(f"{c.name}:{c.type}" for c in table.columns)
+        parts.extend(sorted(index.name for index in table.indexes))
+    parts.extend(f"migration:{number}" for number, _, _ in MIGRATIONS)
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def _database_missing():
+    url = db.engine.url
+    return url.get_backend_name() == 'sqlite' and url.database and not os.path.exists(
+        url.database.split('?')[0].replace('file:', '', 1)
+    )
+
+
+def ensure_schema(app):
+    """
+    Creates tables and applies migrations unless this schema version was
+    already set up on this database. Returns True when the check ran.
+    """
+    from migrations import init_schema
+
+    os.makedirs(app.instance_path, exist_ok=True)
+    marker = os.path.join(app.instance_path, SCHEMA_MARKER.format(schema_fingerprint(app)))
+    with app.app_context():
+        if os.path.exists(marker) and not _database_missing():
+            return False
+        init_schema()
+
+    # Markers of earlier schema versions no longer apply
+    for old in glob.glob(os.path.join(app.instance_path, SCHEMA_MARKER.format('*'))):
+        if old != marker:
+            os.remove(old)
+    with open(marker, 'w') as f:
+        f.write(f"{time.time()}\n")
+    return True
+
+
+def warm_up(app):
+    """Precompiles templates and imports heavy modules. Returns the seconds spent."""
+    started = time.perf_counter()
+    templates = precompile_templates(app)
+    modules = preimport()
+    elapsed = time.perf_counter() - started
+    print(f"Warm-up: {len(templates)} templates, {len(modules)} modules in {elapsed:.2f}s")
+    return elapsed
+
+
+if __name__ == '__main__':
+    from app import app
+    warm_up(app)